@@ -0,0 +1,327 @@
+"""Shared scaffolding for the local_fcsp benchmarks.
+
+No charger, no Home Assistant instance: a FakeFcsp stands in for fcsp_api.FCSP, and a
+StubHass provides just enough of `hass` for the coordinator and entities to run. Entity
+state writes are replaced by a function that computes what Home Assistant would read
+from the entity (state, availability, icon, device info) and then throws it away.
+
+The real `homeassistant` and `fcsp-api` packages still need to be installed — these
+scripts exercise the integration exactly as it ships, not a copy of it.
+"""
+
+import asyncio
+import copy
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from homeassistant.helpers import frame
+
+# Make `custom_components.local_fcsp` importable when run as `python benchmarks/<script>.py`.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_components.local_fcsp.binary_sensor import FCSPOnlineBinarySensor  # noqa: E402
+from custom_components.local_fcsp.client import FcspClient, TokenBucket  # noqa: E402
+from custom_components.local_fcsp.coordinator import FcspDataUpdateCoordinator  # noqa: E402
+from custom_components.local_fcsp.sensor import (  # noqa: E402
+    SENSORS,
+    LocalFCSPSensor,
+    PowerCutSensor,
+)
+
+ENTRY_ID = "benchmark_entry"
+
+# A poll takes hours to come round on the coordinator's own timer, so the
+# benchmarks are the only thing driving refreshes.
+IDLE_SCAN_INTERVAL = 24 * 3600
+
+
+# ---------------------------------------------------------------------------
+# Representative payloads
+# ---------------------------------------------------------------------------
+
+CHARGER_INFO = {
+    "state": "CS00",
+    "maxAmps": 80,
+    "ipAddr": "192.168.1.100",
+    "vWiFi": "1.2.3\x00\x00",
+    "vSystem": "4.5.6",
+    "vHw": "B1",
+    "wifiAddr": "00:11:22:33:44:55",
+    "bleAddr": "66:77:88:99:AA:BB",
+    "passcode": "123456",
+    "catalogNo": "8EV7 180-0SA33-0AM0",
+    "traceNo": "SN123456789",
+}
+
+INVERTER_INFO = [{
+    "vendor": "Delta Electronics",
+    "model": "E4_BDI",
+    "slno": "INV0001234",
+    "firmware": "\\x01\\x01\\x24",
+    "state": 0,
+}]
+
+PLACEHOLDER_INVERTER_INFO = [{
+    "vendor": "Supreme Electronics",
+    "model": "Star",
+    "slno": "",
+    "firmware": "",
+    "state": 0,
+}]
+
+CONFIG_STATUS = {"configured": True, "timezone": "America/Los_Angeles", "gridCode": "UL1741SA"}
+
+NETWORK_INFO = {"ssid": "home", "rssi": -52, "ipAddr": "192.168.1.100", "gateway": "192.168.1.1"}
+
+# (charger state, inverter state) pairs that stay inside the entities' ENUM options.
+STATE_CYCLE = [("CS00", 0), ("CS01", 0), ("CS02", 0), ("CS02", 1), ("CS02", 5), ("CS01", 0)]
+
+
+class FakeFcsp:
+    """Synchronous stand-in for fcsp_api.FCSP with scripted, mutable payloads."""
+
+    def __init__(self, host="127.0.0.1", devkey="devkey", port=443, timeout=30, his_attached=True):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.charger_info = copy.deepcopy(CHARGER_INFO)
+        self.inverter_info = copy.deepcopy(INVERTER_INFO if his_attached else PLACEHOLDER_INVERTER_INFO)
+        self.config_status = copy.deepcopy(CONFIG_STATUS)
+        self.network_info = copy.deepcopy(NETWORK_INFO)
+        self.failing = False
+        self.failing_endpoints = set()  # e.g. {"network_info"}: just those calls fail
+        self.delay = 0.0  # seconds each call takes, like a charger on a bad day
+        self.calls = 0
+        self.closed = 0
+
+    def set_state(self, charger_state, inverter_state) -> None:
+        self.charger_info["state"] = charger_state
+        self.inverter_info[0]["state"] = inverter_state
+
+    def _answer(self, payload, endpoint=None):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.failing or endpoint in self.failing_endpoints:
+            raise ConnectionError("Simulated charger outage")
+        # A fresh parse every time, just like the real client.
+        return copy.deepcopy(payload)
+
+    def connect(self):
+        return self._answer(True)
+
+    def close(self):
+        self.closed += 1
+
+    def get_charger_info(self):
+        return self._answer(self.charger_info, "charger_info")
+
+    def get_inverter_info(self):
+        return self._answer(self.inverter_info, "inverter_info")
+
+    def get_config_status(self):
+        return self._answer(self.config_status, "config_status")
+
+    def get_network_info(self):
+        return self._answer(self.network_info, "network_info")
+
+
+# ---------------------------------------------------------------------------
+# Stub Home Assistant
+# ---------------------------------------------------------------------------
+
+class StubConfig:
+    def __init__(self, config_dir: str) -> None:
+        self.config_dir = config_dir
+        self.time_zone = "UTC"
+        self.components = set()
+
+    def path(self, *parts) -> str:
+        return os.path.join(self.config_dir, *parts)
+
+
+class StubEntry:
+    def __init__(self, entry_id=ENTRY_ID, data=None, options=None) -> None:
+        self.entry_id = entry_id
+        self.data = data or {"host": "127.0.0.1", "port": 443}
+        self.unique_id = None
+        self.options = options or {}
+        self.version = 2
+        self.pref_disable_polling = False
+        self._on_unload = []
+
+    def async_on_unload(self, func) -> None:
+        self._on_unload.append(func)
+
+
+class StubConfigEntries:
+    def __init__(self) -> None:
+        self.entries = {}
+
+    def async_get_entry(self, entry_id):
+        return self.entries.get(entry_id)
+
+    def async_entries(self, domain=None):
+        return list(self.entries.values())
+
+
+class StubHass:
+    """Just enough `hass` for the coordinator and entities, on a real event loop."""
+
+    def __init__(self, loop, executor_workers: int = 2, config_dir: str = None) -> None:
+        self.loop = loop
+        self.data = {}
+        self.config = StubConfig(config_dir or tempfile.gettempdir())
+        self.config_entries = StubConfigEntries()
+        self.is_stopping = False
+        self.executor = ThreadPoolExecutor(executor_workers, thread_name_prefix="fcsp-bench")
+        self.loop_thread_id = threading.get_ident()
+        # Home Assistant's thread-safety and deprecation checks report through the frame helper.
+        frame.async_setup(self)
+
+    def verify_event_loop_thread(self, what: str) -> None:
+        if self.loop_thread_id != threading.get_ident():
+            frame.report_non_thread_safe_operation(what)
+
+    def async_add_executor_job(self, func, *args):
+        return self.loop.run_in_executor(self.executor, func, *args)
+
+    def async_run_hass_job(self, hassjob, *args, background=False):
+        # What event helpers' timers call back through (the probe's interval, for one).
+        result = hassjob.target(*args)
+        if asyncio.iscoroutine(result):
+            return self.loop.create_task(result)
+        return None
+
+    def async_create_task(self, coro, name=None, eager_start=True):
+        return self.loop.create_task(coro, name=name)
+
+    def async_create_background_task(self, coro, name=None, eager_start=True):
+        return self.loop.create_task(coro, name=name)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+class MemoryCache:
+    """In-memory stand-in for LocalFcspCache (no Store, no disk)."""
+
+    def __init__(self) -> None:
+        self._cache = {}
+        self.saves = 0
+        self.flushes = 0
+
+    async def load(self) -> dict:
+        return self._cache
+
+    async def save(self, data: dict) -> None:
+        self._cache = data
+        self.saves += 1
+
+    async def async_flush(self) -> None:
+        self.flushes += 1
+
+
+# ---------------------------------------------------------------------------
+# Entity plumbing
+# ---------------------------------------------------------------------------
+
+def compute_state(entity) -> tuple:
+    """What Home Assistant reads from an entity on every state write."""
+    if hasattr(entity, "is_on"):
+        value = entity.is_on
+    else:
+        value = entity.native_value
+    return (value, entity.available, entity.icon, entity.device_info, entity.unique_id)
+
+
+def build_entities(hass, coordinator, entry_id=ENTRY_ID, debug=True, his=True) -> list:
+    """Every entity the platforms would create for one entry."""
+    entities = []
+    for desc in SENSORS:
+        if desc.debug_only and not debug:
+            continue
+        if desc.device_key == "home_integration" and not his:
+            continue
+        entities.append(LocalFCSPSensor(description=desc, coordinator=coordinator, entry_id=entry_id, hass=hass))
+    if his:
+        entities.append(PowerCutSensor(coordinator, entry_id, hass))
+    entities.append(FCSPOnlineBinarySensor(coordinator, entry_id))
+
+    for entity in entities:
+        entity.hass = hass
+        entity.entity_id = f"sensor.bench_{entity.unique_id}"
+        # Instance attribute shadows Entity.async_write_ha_state for the benchmark.
+        entity.async_write_ha_state = lambda entity=entity: compute_state(entity)
+    return entities
+
+
+async def async_add_entities(entities) -> None:
+    for entity in entities:
+        await entity.async_added_to_hass()
+
+
+async def async_remove_entities(entities) -> None:
+    for entity in entities:
+        await entity.async_will_remove_from_hass()
+        # What Entity.async_remove would do: drop coordinator listeners and friends.
+        for unsub in getattr(entity, "_on_remove", None) or ():
+            unsub()
+        entity._on_remove = None
+
+
+# ---------------------------------------------------------------------------
+# Station lifecycle
+# ---------------------------------------------------------------------------
+
+class Station:
+    """One fake entry: client, coordinator and entities, set up like async_setup_entry does."""
+
+    def __init__(self, hass, fake=None, entry=None, debug=True, his=True, skip_unchanged=True) -> None:
+        self.hass = hass
+        self.fake = fake or FakeFcsp(his_attached=his)
+        self.entry = entry or StubEntry(options={"debug": debug})
+        hass.config_entries.entries[self.entry.entry_id] = self.entry
+        # A budget nobody will ever hit — the benchmarks measure our code, not the bucket.
+        limiter = TokenBucket(requests_per_minute=1e12, burst=10**9)
+        self.client = FcspClient(hass, self.fake, limiter, timeout=self.fake.timeout)
+        self.cache = MemoryCache()
+        self.coordinator = FcspDataUpdateCoordinator(
+            hass=hass,
+            config_entry=self.entry,
+            client=self.client,
+            cache_store=self.cache,
+            cached_data=None,
+            scan_interval=IDLE_SCAN_INTERVAL,
+            skip_unchanged=skip_unchanged,
+        )
+        self.entities = build_entities(hass, self.coordinator, self.entry.entry_id, debug=debug, his=his)
+
+    async def async_start(self) -> None:
+        await async_add_entities(self.entities)
+
+    async def async_poll(self) -> bool:
+        """One refresh, the way DataUpdateCoordinator._async_refresh drives it. False on failure."""
+        try:
+            data = await self.coordinator._async_update_data()
+        except Exception:
+            return False
+        self.coordinator.data = data
+        self.coordinator.async_update_listeners()
+        return True
+
+    async def async_stop(self) -> None:
+        await async_remove_entities(self.entities)
+        # As async_unload_entry does: the last entry out shuts the station down.
+        if self.coordinator.async_detach(self.entry.entry_id):
+            await self.coordinator.async_shutdown()
+        self.hass.config_entries.entries.pop(self.entry.entry_id, None)
+
+
+def run(coro):
+    """Run a benchmark coroutine on a fresh event loop."""
+    return asyncio.run(coro)
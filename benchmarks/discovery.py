@@ -0,0 +1,136 @@
+"""LAN discovery against local stand-in servers.
+
+Sweeps 127.0.0.1–254 the same way the config flow sweeps a /24: bounded concurrent
+TCP connects, then an identify pass over every open port under its own, much smaller
+bound. A handful of loopback addresses listen as stand-in "chargers"; many more listen
+but aren't one — some answer charger_info with something that isn't a charger's, some
+refuse the FCSP conversation outright.
+
+Identify is the integration's own async_identify_station: request budget, FcspClient,
+connect, get_charger_info, close. Only the fcsp_api session underneath is a FakeFcsp,
+chosen by address, since the stand-ins can't speak the real protocol. Every identify
+takes a little while, so the run also checks that no more sessions were open at once
+than the identify bound allows.
+
+    python benchmarks/discovery.py
+    python benchmarks/discovery.py --chargers 5 --budget 2.0 --concurrency 16 --identify-concurrency 2
+
+Exits non-zero when the wrong stations are found, the identify pass goes over its
+bound, or the sweep blows its time budget.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from functools import partial
+
+from _harness import FakeFcsp, StubHass
+from custom_components.local_fcsp.const import DISCOVERY_CONCURRENCY, DISCOVERY_IDENTIFY_CONCURRENCY
+from custom_components.local_fcsp.discovery import async_discover_stations, async_identify_station
+
+# How long each stand-in takes over a call, so identify sessions overlap like real ones.
+CALL_DELAY = 0.02
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=18443, help="port the stand-ins listen on")
+    parser.add_argument("--chargers", type=int, default=3, help="stand-in chargers to start")
+    parser.add_argument("--decoys", type=int, default=100, help="open ports that aren't chargers")
+    parser.add_argument("--concurrency", type=int, default=DISCOVERY_CONCURRENCY, help="simultaneous connects")
+    parser.add_argument(
+        "--identify-concurrency", type=int, default=DISCOVERY_IDENTIFY_CONCURRENCY, help="simultaneous identify sessions"
+    )
+    parser.add_argument("--budget", type=float, default=3.0, help="seconds allowed for the whole sweep")
+    return parser.parse_args(argv)
+
+
+class StandInFcsp(FakeFcsp):
+    """What async_identify_station finds at each address: a charger, a web server, or a closed door."""
+
+    chargers = set()
+    open_sessions = 0
+    peak_sessions = 0
+
+    def __init__(self, host, devkey, port, timeout) -> None:
+        super().__init__(host=host, devkey=devkey, port=port, timeout=timeout)
+        self.delay = CALL_DELAY
+        if host in self.chargers:
+            self.charger_info["traceNo"] = f"SN-{host}"
+        elif int(host.rsplit(".", 1)[1]) % 2:
+            self.charger_info = "<html><body>400 Bad Request</body></html>"
+        else:
+            self.failing = True
+        cls = type(self)
+        cls.open_sessions += 1
+        cls.peak_sessions = max(cls.peak_sessions, cls.open_sessions)
+
+    def close(self) -> None:
+        super().close()
+        type(self).open_sessions -= 1
+
+
+async def _serve(host: str, port: int):
+    async def handle(reader, writer):
+        writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def bench(args) -> int:
+    chargers = [f"127.0.0.{10 + i * 20}" for i in range(args.chargers)]
+    decoys = [f"127.0.0.{i}" for i in range(1, 255) if f"127.0.0.{i}" not in chargers][: args.decoys]
+    StandInFcsp.chargers = set(chargers)
+    servers = [await _serve(host, args.port) for host in chargers + decoys]
+
+    hass = StubHass(asyncio.get_running_loop())
+    hosts = [f"127.0.0.{i}" for i in range(1, 255)]
+    started = time.perf_counter()
+    try:
+        found = await async_discover_stations(
+            hass,
+            "devkey",
+            args.port,
+            hosts=hosts,
+            identify=partial(async_identify_station, fcsp_factory=StandInFcsp),
+            concurrency=args.concurrency,
+            identify_concurrency=args.identify_concurrency,
+        )
+    finally:
+        elapsed = time.perf_counter() - started
+        for server in servers:
+            server.close()
+            await server.wait_closed()
+        hass.close()
+
+    print(f"swept {len(hosts)} hosts, {len(servers)} listening, in {elapsed:.2f}s (budget {args.budget:.1f}s)")
+    print(f"found: {sorted(found)}")
+    print(f"identify sessions open at once: {StandInFcsp.peak_sessions} (bound {args.identify_concurrency})")
+
+    failed = False
+    if sorted(found) != sorted(chargers):
+        failed = True
+        print(f"FAIL: expected {sorted(chargers)}")
+    if any(info.get("traceNo") != f"SN-{host}" for host, info in found.items()):
+        failed = True
+        print("FAIL: charger info doesn't match the station it came from")
+    if StandInFcsp.peak_sessions > args.identify_concurrency:
+        failed = True
+        print("FAIL: identify went over its concurrency bound")
+    if StandInFcsp.open_sessions:
+        failed = True
+        print(f"FAIL: {StandInFcsp.open_sessions} identify session(s) left open")
+    if elapsed > args.budget:
+        failed = True
+        print("FAIL: sweep was too slow")
+    print("FAIL" if failed else "PASS")
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    return asyncio.run(bench(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
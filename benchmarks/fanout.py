@@ -0,0 +1,198 @@
+"""Entity fan-out microbenchmark: what one coordinator update costs the entity layer.
+
+For each combination of HIS attached/not and debug sensors on/off, builds every entity the
+platforms would create (all SENSORS descriptions, PowerCutSensor, FCSPOnlineBinarySensor)
+and times coordinator.async_update_listeners() — value, icon and device_info computation plus
+the state write — against pre-cleaned, representative payloads that change state every refresh.
+
+Reports time per refresh and peak traced memory per refresh (tracemalloc, a separate pass).
+Each config is measured --samples times from scratch, each time the best of --rounds GC-free
+rounds, and the median of those is what counts: one bad second on a shared box doesn't fail the
+run, and one lucky one doesn't set the baseline. Compares both against
+benchmarks/baselines/fanout.json and fails when a number exceeds its baseline by more than the
+tolerance. Timing baselines are scaled by a pure-Python calibration loop, so a slower machine
+isn't a regression.
+
+    python benchmarks/fanout.py                       # compare against baselines
+    python benchmarks/fanout.py --update-baselines    # after an intentional change
+    python benchmarks/fanout.py --tolerance 2 --samples 9
+"""
+
+import argparse
+import asyncio
+import copy
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from _harness import STATE_CYCLE, FakeFcsp, StubHass, Station, run
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINES = os.path.join(HERE, "baselines", "fanout.json")
+
+CONFIGS = {
+    "his_debug": {"his": True, "debug": True},
+    "his_nodebug": {"his": True, "debug": False},
+    "nohis_debug": {"his": False, "debug": True},
+    "nohis_nodebug": {"his": False, "debug": False},
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--refreshes", type=int, default=500, help="refreshes per timing round")
+    parser.add_argument("--rounds", type=int, default=15, help="timing rounds (the fastest is reported)")
+    parser.add_argument("--samples", type=int, default=5, help="independent measurements per config (the median counts)")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed ratio over baseline")
+    parser.add_argument("--update-baselines", action="store_true", help="write the results as the new baselines")
+    parser.add_argument("--baselines", default=BASELINES)
+    return parser.parse_args(argv)
+
+
+def calibrate() -> float:
+    """Microseconds for a fixed pure-Python workload: dicts, strings, attribute access."""
+    def workload():
+        total = 0
+        for i in range(20_000):
+            record = {"state": f"CS0{i % 3}", "value": i}
+            total += len(record["state"]) + record["value"] % 7
+        return total
+
+    timings = []
+    for _ in range(15):
+        started = time.perf_counter()
+        workload()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1e6
+
+
+def build_payloads(station, his: bool) -> list:
+    """One cleaned data dict per STATE_CYCLE step, prepared up front so cleaning isn't timed."""
+    payloads = []
+    for charger_state, inverter_state in STATE_CYCLE:
+        fake = FakeFcsp(his_attached=his)
+        fake.set_state(charger_state, inverter_state)
+        raw = {
+            "charger_info": copy.deepcopy(fake.charger_info),
+            "inverter_info": copy.deepcopy(fake.inverter_info),
+            "config_status": copy.deepcopy(fake.config_status),
+            "network_info": copy.deepcopy(fake.network_info),
+        }
+        payloads.append(station.coordinator._clean(raw))
+    return payloads
+
+
+def fan_out(coordinator, payloads, refreshes: int) -> None:
+    count = len(payloads)
+    for i in range(refreshes):
+        coordinator.data = payloads[i % count]
+        coordinator.async_update_listeners()
+
+
+async def measure(config: dict, args) -> dict:
+    hass = StubHass(asyncio.get_running_loop())
+    station = Station(hass, debug=config["debug"], his=config["his"])
+    await station.async_start()
+    payloads = build_payloads(station, config["his"])
+
+    fan_out(station.coordinator, payloads, 200)  # warm-up
+
+    gc.disable()
+    try:
+        rounds = []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            fan_out(station.coordinator, payloads, args.refreshes)
+            rounds.append((time.perf_counter() - started) / args.refreshes)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        fan_out(station.coordinator, payloads, len(payloads))
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        fan_out(station.coordinator, payloads, len(payloads))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    entities = len(station.entities)
+    await station.async_stop()
+    hass.close()
+    return {
+        "entities": entities,
+        "us_per_refresh": round(min(rounds) * 1e6, 2),
+        "peak_kib_per_refresh": round((peak - baseline) / 1024, 2),
+    }
+
+
+async def measure_median(config: dict, args) -> dict:
+    samples = [await measure(config, args) for _ in range(args.samples)]
+    return {
+        "entities": samples[0]["entities"],
+        "us_per_refresh": round(statistics.median(s["us_per_refresh"] for s in samples), 2),
+        "peak_kib_per_refresh": round(statistics.median(s["peak_kib_per_refresh"] for s in samples), 2),
+    }
+
+
+async def bench(args) -> int:
+    calibration = calibrate()
+    results = {name: await measure_median(config, args) for name, config in CONFIGS.items()}
+
+    print(f"calibration: {calibration:.0f} µs")
+    print(f"{'config':<16}{'entities':>9}{'µs/refresh':>13}{'µs/entity':>11}{'peak KiB':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<16}{result['entities']:>9}{result['us_per_refresh']:>13.1f}"
+            f"{result['us_per_refresh'] / result['entities']:>11.2f}{result['peak_kib_per_refresh']:>10.2f}"
+        )
+
+    if args.update_baselines:
+        os.makedirs(os.path.dirname(args.baselines), exist_ok=True)
+        with open(args.baselines, "w", encoding="utf-8") as handle:
+            json.dump({"calibration_us": round(calibration, 1), "configs": results}, handle, indent=2)
+            handle.write("\n")
+        print(f"baselines written to {args.baselines}")
+        return 0
+
+    try:
+        with open(args.baselines, encoding="utf-8") as handle:
+            baselines = json.load(handle)
+    except FileNotFoundError:
+        print(f"no baselines at {args.baselines}; run with --update-baselines first")
+        return 2
+
+    # A machine that runs the calibration loop 20% slower gets 20% more time, and no more.
+    scale = calibration / baselines["calibration_us"]
+    failed = False
+    for name, result in results.items():
+        base = baselines["configs"].get(name)
+        if base is None:
+            print(f"{name}: no baseline, skipped")
+            continue
+        if result["entities"] != base["entities"]:
+            print(f"note: {name} now has {result['entities']} entities (baseline {base['entities']})")
+        time_budget = base["us_per_refresh"] * scale * args.tolerance
+        memory_budget = max(base["peak_kib_per_refresh"] * args.tolerance, base["peak_kib_per_refresh"] + 1)
+        if result["us_per_refresh"] > time_budget:
+            failed = True
+            print(f"FAIL: {name} took {result['us_per_refresh']:.1f} µs/refresh (budget {time_budget:.1f})")
+        if result["peak_kib_per_refresh"] > memory_budget:
+            failed = True
+            print(f"FAIL: {name} peaked at {result['peak_kib_per_refresh']:.2f} KiB/refresh (budget {memory_budget:.2f})")
+
+    print("FAIL" if failed else "PASS")
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    return run(bench(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
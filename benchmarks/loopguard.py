@@ -0,0 +1,288 @@
+"""Loop guard: does anything we run on the event loop hold it for too long?
+
+Home Assistant runs every integration on one event loop, so a callback that blocks it for
+100 ms stalls every automation, dashboard and other integration for those 100 ms. The
+obvious suspects are the blocking fcsp_api calls, which belong on worker threads. Less obvious
+ones sit on the loop itself: the debug sensors' JSON dumps, the Last Updated sensors'
+strftime, the websocket snapshot diff, and the outage journal.
+
+This runs a station through the harness's setup, polls (with state changes, byte-identical
+polls, selective refreshes, a partial failure and a failure streak long enough to go offline),
+and the harness's unload. It uses a fake charger, with asyncio's debug mode on. Any callback
+or task step that holds the loop longer than --budget-ms fails the run. Ones over half the
+budget are reported as near misses. Debug mode only names the task or callback, which is usually the benchmark's own
+coroutine. So a watchdog thread also snapshots the loop thread's stack while it's held, and
+each report names the line in custom_components/local_fcsp that was running.
+
+Debug mode also catches calls into the loop from the wrong thread, and tasks whose exceptions
+nobody retrieved. Both fail the run too, as does a coroutine that was never awaited.
+
+"Setup" and "unload" are the harness's, not the integration's: the station is put together by
+hand, like `_harness.Station`, with the outage journal, liveness probe and a websocket
+subscriber added. So the timings cover the client and its worker threads, the coordinator's
+polls and shutdown, the entities, the journal, the probe and the snapshot stream. They don't
+cover:
+
+  - async_setup_entry and async_unload_entry themselves: the shared-station lookup, the cache
+    Store, platform forwarding and the entity registry, and _async_release_station
+  - the config flow's session handoff (the client connects to the fake charger directly)
+  - the fetch planner (the coordinator polls every endpoint)
+  - the load monitor: under debug mode's overhead it may call the loop busy and shed the very
+    work (debug dumps, Last Updated rewrites) this is meant to time
+  - hourly statistics (the recorder)
+  - the options update listener
+
+    python benchmarks/loopguard.py
+    python benchmarks/loopguard.py --budget-ms 20 --cycles 10
+    python benchmarks/loopguard.py --inject-block-ms 80     # prove the guard bites
+
+Exits non-zero when the loop was held too long, debug mode caught anything else, or a phase
+raised before it could be measured.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from functools import partial
+
+from _harness import STATE_CYCLE, StubHass, Station, run
+from custom_components.local_fcsp.journal import OutageJournal
+from custom_components.local_fcsp.probe import LivenessProbe
+from custom_components.local_fcsp.websocket_api import SnapshotStream
+
+# Callbacks over this fraction of the budget are reported, but don't fail the run.
+NEAR_MISS_FRACTION = 0.5
+
+OUR_CODE = os.path.join("custom_components", "local_fcsp")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="longest any one callback may hold the loop")
+    parser.add_argument("--cycles", type=int, default=3, help="setup-to-unload cycles")
+    parser.add_argument("--polls", type=int, default=50, help="polls per phase")
+    parser.add_argument("--failure-length", type=int, default=4, help="failed polls in the failure streak")
+    parser.add_argument(
+        "--inject-block-ms", type=float, default=0.0, help="add a coordinator listener that blocks this long"
+    )
+    parser.add_argument("--show", type=int, default=10, help="offending callbacks to print")
+    return parser.parse_args(argv)
+
+
+class LoopWatch(logging.Handler):
+    """Collects what asyncio's debug mode reports, tagged with the phase that was running.
+
+    While installed, every loop callback notes when it started; a watchdog thread that finds one
+    still running past the near-miss line grabs the loop thread's stack, so the report can say
+    where we were, not just which task.
+    """
+
+    def __init__(self, budget: float) -> None:
+        super().__init__(logging.DEBUG)
+        self.budget = budget
+        self.phase = "startup"
+        self.slow = []  # (phase, seconds, where)
+        self.errors = []  # (phase, message)
+        self._started = None  # perf_counter() when the running callback started, None between them
+        self._culprits = {}  # that start -> where the loop thread was
+        self._loop_thread = threading.get_ident()
+        self._stop = threading.Event()
+        self._original_run = asyncio.events.Handle._run
+
+    def install(self) -> None:
+        watch, original_run = self, self._original_run
+
+        def timed_run(handle):
+            watch._started = time.perf_counter()
+            try:
+                return original_run(handle)
+            finally:
+                watch._started = None
+
+        asyncio.events.Handle._run = timed_run
+        threading.Thread(target=self._watchdog, name="loopguard", daemon=True).start()
+
+    def uninstall(self) -> None:
+        asyncio.events.Handle._run = self._original_run
+        self._stop.set()
+
+    def _watchdog(self) -> None:
+        line = self.budget * NEAR_MISS_FRACTION
+        while not self._stop.wait(line / 5):
+            started = self._started
+            if started is None or started in self._culprits or time.perf_counter() - started < line:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                self._culprits[started] = where(frame)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.msg.startswith("Executing ") and len(record.args) == 2:
+            what, seconds = record.args
+            # asyncio logs straight after the callback returns, so it's the latest one we caught.
+            caught = dict(self._culprits)
+            self._culprits.clear()
+            culprit = caught[max(caught)] if caught else None
+            self.slow.append((self.phase, seconds, culprit or str(what)))
+        elif record.levelno >= logging.ERROR:
+            self.errors.append((self.phase, record.getMessage()))
+
+    def over_budget(self) -> list:
+        return [item for item in self.slow if item[1] > self.budget]
+
+    def near_misses(self) -> list:
+        return [item for item in self.slow if item[1] <= self.budget]
+
+
+def where(frame) -> str:
+    """Innermost line of ours on the stack (plus the very innermost, if that's not ours)."""
+    innermost = frame
+    while frame is not None and OUR_CODE not in frame.f_code.co_filename:
+        frame = frame.f_back
+    inner = f"{innermost.f_code.co_filename}:{innermost.f_lineno} in {innermost.f_code.co_name}"
+    if frame is None:
+        return f"not in local_fcsp; innermost {inner}"
+    ours = f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+    return ours if frame is innermost else f"{ours} (innermost {inner})"
+
+
+async def drain() -> None:
+    """Let what a phase scheduled (listeners, writes, executor hand-backs) run before the next starts."""
+    for _ in range(5):
+        await asyncio.sleep(0.005)
+
+
+async def cycle(hass, port: int, watch: LoopWatch, args) -> None:
+    watch.phase = "setup"
+    station = Station(hass, debug=True, his=True)
+    coordinator = station.coordinator
+    await station.client.async_connect()
+    coordinator.journal = OutageJournal(hass, station.entry.entry_id)
+    await coordinator.journal.async_load()
+    coordinator.async_add_listener(partial(coordinator.journal.async_observe, coordinator))
+    coordinator.probe = LivenessProbe(hass, "127.0.0.1", port, on_change=coordinator.async_set_reachable)
+    coordinator.probe.async_start()
+    if args.inject_block_ms:
+        coordinator.async_add_listener(lambda: time.sleep(args.inject_block_ms / 1000))
+    await station.async_start()
+    await station.async_poll()
+    # A dashboard watching, and Home Assistant serialising what it's sent, as the websocket API would.
+    coordinator.stream = SnapshotStream(hass, coordinator)
+    coordinator.stream.async_subscribe(lambda payload: json.dumps(payload, default=str))
+    await coordinator.probe.async_probe()
+    await drain()
+
+    watch.phase = "refresh"
+    for index in range(args.polls):
+        station.fake.set_state(*STATE_CYCLE[index % len(STATE_CYCLE)])
+        await station.async_poll()
+    await drain()
+
+    watch.phase = "unchanged"
+    for _ in range(args.polls):
+        await station.async_poll()
+    await drain()
+
+    watch.phase = "selective"
+    for _ in range(max(1, args.polls // 10)):
+        # Close together, so they coalesce into one trip, as service calls would.
+        await asyncio.gather(
+            coordinator.async_refresh_endpoints(["network_info"]),
+            coordinator.async_refresh_endpoints(["config_status", "network_info"]),
+        )
+    await drain()
+
+    watch.phase = "failure"
+    station.fake.failing_endpoints = {"network_info"}
+    await station.async_poll()
+    station.fake.failing_endpoints = set()
+    station.fake.failing = True
+    for _ in range(args.failure_length):
+        await station.async_poll()
+    station.fake.failing = False
+    await station.async_poll()
+    await drain()
+
+    watch.phase = "unload"
+    await station.async_stop()
+    await drain()
+
+
+async def bench(args) -> int:
+    loop = asyncio.get_running_loop()
+    budget = args.budget_ms / 1000
+    loop.set_debug(True)
+    loop.slow_callback_duration = budget * NEAR_MISS_FRACTION
+
+    watch = LoopWatch(budget)
+    asyncio_logger = logging.getLogger("asyncio")
+    asyncio_logger.addHandler(watch)
+    asyncio_logger.propagate = False
+    watch.install()
+
+    server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    with tempfile.TemporaryDirectory() as config_dir, warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", RuntimeWarning)
+        hass = StubHass(loop, config_dir=config_dir)
+        try:
+            for _ in range(args.cycles):
+                await cycle(hass, port, watch, args)
+        except Exception as err:
+            # A station that can't get through a phase hasn't been measured; say where it stopped.
+            watch.errors.append((watch.phase, f"{type(err).__name__}: {err}"))
+        finally:
+            watch.phase = "teardown"
+            server.close()
+            await server.wait_closed()
+            hass.close()
+            watch.uninstall()
+    unawaited = [str(warning.message) for warning in caught if "never awaited" in str(warning.message)]
+
+    over, near = watch.over_budget(), watch.near_misses()
+    print(f"cycles: {args.cycles}  polls per phase: {args.polls}  budget: {args.budget_ms:.0f} ms")
+    for phase in ("setup", "refresh", "unchanged", "selective", "failure", "unload", "teardown"):
+        seen = [seconds for item_phase, seconds, _ in watch.slow if item_phase == phase]
+        worst = f"worst {max(seen) * 1e3:.1f} ms" if seen else "none over half the budget"
+        print(f"  {phase:<10} {sum(s > budget for s in seen):3d} over, {sum(s <= budget for s in seen):3d} near  ({worst})")
+
+    failed = False
+    if over:
+        failed = True
+        print(f"FAIL: {len(over)} callback(s) held the loop longer than {args.budget_ms:.0f} ms:")
+        for phase, seconds, what in sorted(over, key=lambda item: -item[1])[: args.show]:
+            print(f"  [{phase}] {seconds * 1e3:.1f} ms  {what[:300]}")
+    elif near:
+        print(f"near misses (over {args.budget_ms * NEAR_MISS_FRACTION:.0f} ms):")
+        for phase, seconds, what in sorted(near, key=lambda item: -item[1])[: args.show]:
+            print(f"  [{phase}] {seconds * 1e3:.1f} ms  {what[:300]}")
+    if watch.errors:
+        failed = True
+        print("FAIL: asyncio debug mode reported:")
+        for phase, message in watch.errors[: args.show]:
+            print(f"  [{phase}] {message.splitlines()[0]}")
+    if unawaited:
+        failed = True
+        print("FAIL: coroutines never awaited:")
+        for message in unawaited[: args.show]:
+            print(f"  {message}")
+
+    print("FAIL" if failed else "PASS")
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.getLogger("custom_components.local_fcsp").setLevel(logging.CRITICAL)
+    return run(bench(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Reload loop: does unloading a station really let go of everything?
+
+Options changes, integration updates and "reload" in the UI all tear a station down and set it
+up again, so anything teardown forgets piles up. Each cycle here builds a station the way
+async_setup_entry does (client, coordinator, entities, liveness probe against a local TCP
+listener, load monitor), polls it, starts one more poll against a deliberately slow charger,
+and tears the station down mid-call the way async_unload_entry does (the coordinator shuts down
+its client, timers, probe and load monitor).
+
+After a warm-up, open file descriptors (sockets included), threads and asyncio tasks must stay
+flat; every cycle must close its FCSP session, and the interrupted poll must return promptly
+instead of waiting out the slow call.
+
+    python benchmarks/reload.py
+    python benchmarks/reload.py --cycles 1000 --slow-call 0.5
+
+Exits non-zero when anything leaks.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+
+from _harness import FakeFcsp, StubEntry, StubHass, Station, run
+from custom_components.local_fcsp.load import LoadMonitor
+from custom_components.local_fcsp.probe import LivenessProbe
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cycles", type=int, default=200, help="setup/unload cycles")
+    parser.add_argument("--warmup", type=int, default=10, help="cycles before the baseline is taken")
+    parser.add_argument("--polls", type=int, default=5, help="polls per cycle before the interrupted one")
+    parser.add_argument("--slow-call", type=float, default=0.2, help="seconds the interrupted call takes")
+    return parser.parse_args(argv)
+
+
+def open_fds() -> int | None:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None  # Not Linux; sockets are still counted as tasks and threads below.
+
+
+async def settle() -> None:
+    """Abandoned calls finish their sleep on their own; give the client's threads a moment to go home."""
+    for _ in range(200):
+        if not any(thread.name.startswith("local_fcsp_") for thread in threading.enumerate()):
+            return
+        await asyncio.sleep(0.01)
+
+
+async def cycle(hass, port: int, args) -> tuple[float, int]:
+    """One setup, some polls, one unload mid-call. Returns (unload seconds, FCSP sessions closed)."""
+    fake = FakeFcsp()
+    station = Station(hass, fake=fake, entry=StubEntry(data={"host": "127.0.0.1", "port": port}))
+    coordinator = station.coordinator
+    coordinator.probe = LivenessProbe(hass, "127.0.0.1", port)
+    coordinator.probe.async_start()
+    coordinator.load = LoadMonitor(hass, on_change=coordinator.async_set_busy)
+    coordinator.load.async_start()
+    await station.async_start()
+
+    for _ in range(args.polls):
+        await station.async_poll()
+    await coordinator.probe.async_probe()
+
+    fake.delay = args.slow_call
+    fake.set_state("CS01", 0)
+    interrupted = asyncio.create_task(station.async_poll())
+    await asyncio.sleep(args.slow_call / 4)  # Let it get as far as a worker thread.
+
+    started = time.perf_counter()
+    await station.async_stop()
+    await interrupted
+    return time.perf_counter() - started, fake.closed
+
+
+async def bench(args) -> int:
+    hass = StubHass(asyncio.get_running_loop())
+    server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    baseline = None
+    unload_times = []
+    unclosed = 0
+
+    for index in range(args.cycles):
+        elapsed, closed = await cycle(hass, port, args)
+        unload_times.append(elapsed)
+        unclosed += closed != 1
+        if index + 1 == args.warmup:
+            await settle()
+            baseline = (open_fds(), threading.active_count(), len(asyncio.all_tasks()))
+
+    await settle()
+    final = (open_fds(), threading.active_count(), len(asyncio.all_tasks()))
+    server.close()
+    await server.wait_closed()
+    hass.close()
+
+    ordered = sorted(unload_times)
+    print(f"cycles: {args.cycles}  slow call: {args.slow_call:.2f}s")
+    print(f"unload (mid-call): p50 {ordered[len(ordered) // 2] * 1e3:.1f} ms, max {ordered[-1] * 1e3:.1f} ms")
+    print(f"open fds: {baseline[0]} -> {final[0]}")
+    print(f"threads: {baseline[1]} -> {final[1]}")
+    print(f"tasks: {baseline[2]} -> {final[2]}")
+    print(f"FCSP sessions left open: {unclosed}")
+
+    failed = False
+    if baseline[0] is not None and final[0] > baseline[0]:
+        failed = True
+        print("FAIL: file descriptors (sockets) leaked")
+    if final[1] > baseline[1]:
+        failed = True
+        print("FAIL: threads leaked:", ", ".join(thread.name for thread in threading.enumerate()))
+    if final[2] > baseline[2]:
+        failed = True
+        print("FAIL: tasks leaked:")
+        for task in asyncio.all_tasks():
+            print(f"  {task!r}")
+    if unclosed:
+        failed = True
+        print("FAIL: unload didn't close every FCSP session")
+    if ordered[-1] >= args.slow_call:
+        failed = True
+        print("FAIL: unload waited for the in-flight call instead of letting go of it")
+
+    print("FAIL" if failed else "PASS")
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.warmup >= args.cycles:
+        print("--warmup must be smaller than --cycles")
+        return 2
+    logging.getLogger("custom_components.local_fcsp").setLevel(logging.CRITICAL)
+    return run(bench(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
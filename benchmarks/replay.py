@@ -0,0 +1,126 @@
+"""Replay a captured FCSP session through the real coordinator and entities.
+
+Feeds a capture file (from the local_fcsp.capture service) to a ReplayFcsp, and drives
+FcspDataUpdateCoordinator and every entity through it one poll per recorded poll —
+errors, odd states and all. Use it to:
+
+* benchmark cleaning and the entity fan-out against real traffic (``--speed 0``, the default,
+  answers instantly, so the timings are our code and nothing else);
+* watch a user's session play out at the speed it happened (``--speed 1``) or faster (``--speed 30``);
+* turn a capture into a regression fixture: ``--write-expect`` saves every entity's state after
+  every poll, ``--expect`` checks a later run still produces exactly the same.
+
+    python benchmarks/replay.py                                   # the bundled sample
+    python benchmarks/replay.py ~/local_fcsp_capture_abc_20260614-180000.jsonl --iterations 50
+    python benchmarks/replay.py captures/sample.jsonl --expect captures/sample.expected.json
+
+Exits non-zero when --expect finds a difference.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+from _harness import StubHass, Station, compute_state, run
+from custom_components.local_fcsp.capture import ReplayFcsp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", nargs="?", default=os.path.join(HERE, "captures", "sample.jsonl"))
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = as recorded, N = N times faster, 0 = no waiting")
+    parser.add_argument("--iterations", type=int, default=1, help="replay the whole capture this many times")
+    parser.add_argument("--expect", help="fixture to compare entity states against")
+    parser.add_argument("--write-expect", help="write entity states after every poll to this fixture")
+    return parser.parse_args(argv)
+
+
+def snapshot(station) -> dict:
+    """Every entity's state and availability, minus the ones that depend on the wall clock."""
+    states = {}
+    for entity in station.entities:
+        value, available, *_ = compute_state(entity)
+        if isinstance(value, (datetime.datetime, datetime.date)) or "last_updated" in entity.unique_id:
+            continue
+        states[entity.unique_id] = [value, available]
+    return states
+
+
+async def replay_once(hass, path: str, speed: float) -> tuple[list, list]:
+    fake = ReplayFcsp(path, speed=speed)
+    station = Station(hass, fake=fake)
+    await station.async_start()
+
+    durations, snapshots = [], []
+    started = time.monotonic()
+    while fake.remaining_cycles:
+        if speed > 0:
+            due = started + fake.next_cycle_offset() / speed
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+        poll_started = time.perf_counter()
+        await station.async_poll()
+        durations.append(time.perf_counter() - poll_started)
+        snapshots.append(snapshot(station))
+
+    await station.async_stop()
+    return durations, snapshots
+
+
+async def bench(args) -> int:
+    hass = StubHass(asyncio.get_running_loop())
+    all_durations = []
+    snapshots = []
+    for _ in range(args.iterations):
+        durations, snapshots = await replay_once(hass, args.capture, args.speed)
+        all_durations.extend(durations)
+    hass.close()
+
+    polls = len(all_durations)
+    print(f"capture: {args.capture}")
+    print(f"polls replayed: {polls} ({polls // max(args.iterations, 1)} per pass, {args.iterations} pass(es))")
+    if all_durations:
+        ordered = sorted(all_durations)
+        print(
+            f"per poll: mean {statistics.fmean(ordered) * 1e3:.3f} ms, "
+            f"p50 {ordered[len(ordered) // 2] * 1e3:.3f} ms, "
+            f"p99 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e3:.3f} ms"
+        )
+
+    if args.write_expect:
+        with open(args.write_expect, "w", encoding="utf-8") as handle:
+            json.dump(snapshots, handle, indent=1, default=str)
+        print(f"wrote {len(snapshots)} poll snapshots to {args.write_expect}")
+
+    if args.expect:
+        with open(args.expect, encoding="utf-8") as handle:
+            expected = json.load(handle)
+        actual = json.loads(json.dumps(snapshots, default=str))
+        if actual != expected:
+            print(f"FAIL: entity states differ from {args.expect}")
+            for index, (want, got) in enumerate(zip(expected, actual)):
+                for key in sorted(set(want) | set(got)):
+                    if want.get(key) != got.get(key):
+                        print(f"  poll {index}: {key}: expected {want.get(key)!r}, got {got.get(key)!r}")
+            if len(expected) != len(actual):
+                print(f"  expected {len(expected)} polls, got {len(actual)}")
+            return 1
+        print(f"PASS: {len(actual)} polls match {args.expect}")
+    return 0
+
+
+def main(argv=None) -> int:
+    # Replayed outages are expected; a warning per failed poll is not.
+    logging.getLogger("custom_components.local_fcsp").setLevel(logging.CRITICAL)
+    return run(bench(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
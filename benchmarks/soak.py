@@ -0,0 +1,146 @@
+"""Long-run memory soak for the coordinator and entity layer.
+
+Drives FcspDataUpdateCoordinator and every entity the platforms create through a
+large number of simulated polls against a FakeFcsp: state changes, byte-identical
+polls, failure streaks long enough to go offline, and periodic full reloads.
+
+Memory is tracked with tracemalloc. After a warm-up, a baseline snapshot is taken;
+at the end, growth over that baseline must stay under budget, and once the last
+station is torn down there must be no leftover tasks and no extra threads.
+
+    python benchmarks/soak.py                      # 200k polls, default budgets
+    python benchmarks/soak.py --polls 500000 --growth-budget-kib 256
+
+Exits non-zero when any budget is exceeded.
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+
+from _harness import STATE_CYCLE, StubHass, Station, run
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--polls", type=int, default=200_000, help="total simulated polls")
+    parser.add_argument("--warmup", type=int, default=20_000, help="polls before the baseline snapshot")
+    parser.add_argument("--reload-every", type=int, default=25_000, help="tear down and rebuild every N polls")
+    parser.add_argument("--state-change-every", type=int, default=7, help="change charger/inverter state every N polls")
+    parser.add_argument("--failure-every", type=int, default=10_000, help="start a failure streak every N polls")
+    parser.add_argument("--failure-length", type=int, default=6, help="polls per failure streak")
+    parser.add_argument("--growth-budget-kib", type=float, default=512.0, help="allowed steady-state growth")
+    parser.add_argument("--top", type=int, default=10, help="allocation sites to print on failure")
+    return parser.parse_args(argv)
+
+
+def _traced_bytes() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def soak(args) -> int:
+    loop = asyncio.get_running_loop()
+    hass = StubHass(loop)
+    baseline_threads = threading.active_count()
+    baseline_tasks = len(asyncio.all_tasks())
+
+    station = Station(hass)
+    await station.async_start()
+
+    failures = reloads = hits = misses = 0
+    baseline_snapshot = baseline_bytes = None
+    state_index = 0
+    started = time.perf_counter()
+
+    for poll in range(1, args.polls + 1):
+        if poll % args.state_change_every == 0:
+            state_index = (state_index + 1) % len(STATE_CYCLE)
+            station.fake.set_state(*STATE_CYCLE[state_index])
+
+        station.fake.failing = (poll % args.failure_every) < args.failure_length and poll > args.failure_length
+        failures += station.fake.failing
+        await station.async_poll()
+
+        if poll % args.reload_every == 0:
+            fake = station.fake
+            hits += station.coordinator.short_circuit_hits
+            misses += station.coordinator.short_circuit_misses
+            await station.async_stop()
+            station = Station(hass, fake=fake)
+            await station.async_start()
+            reloads += 1
+
+        if poll == args.warmup:
+            baseline_bytes = _traced_bytes()
+            baseline_snapshot = tracemalloc.take_snapshot()
+
+    elapsed = time.perf_counter() - started
+    final_bytes = _traced_bytes()
+    final_snapshot = tracemalloc.take_snapshot()
+
+    hits += station.coordinator.short_circuit_hits
+    misses += station.coordinator.short_circuit_misses
+    print(f"polls: {args.polls}  reloads: {reloads}  failed polls: {failures}  elapsed: {elapsed:.1f}s")
+    print(f"per poll: {elapsed / args.polls * 1e6:.1f} µs (traced)")
+    print(f"short-circuit: hits={hits} misses={misses}")
+
+    await station.async_stop()
+    hass.close()
+    # Retired worker pools wind down on their own; give their threads a moment to notice.
+    for _ in range(100):
+        if threading.active_count() <= baseline_threads:
+            break
+        await asyncio.sleep(0.01)
+    leftover_tasks = [
+        task for task in asyncio.all_tasks() if task is not asyncio.current_task()
+    ]
+    extra_threads = threading.active_count() - baseline_threads
+
+    growth_kib = (final_bytes - baseline_bytes) / 1024 if baseline_bytes is not None else 0.0
+    print(f"steady-state growth: {growth_kib:.1f} KiB (budget {args.growth_budget_kib:.0f} KiB)")
+    print(f"leftover tasks: {len(leftover_tasks)} (started with {baseline_tasks - 1} besides this one)")
+    print(f"extra threads: {extra_threads}")
+
+    failed = False
+    if growth_kib > args.growth_budget_kib:
+        failed = True
+        print("FAIL: memory grew past budget. Top allocation sites since warm-up:")
+        for stat in final_snapshot.compare_to(baseline_snapshot, "lineno")[: args.top]:
+            print(f"  {stat}")
+    if len(leftover_tasks) > baseline_tasks - 1:
+        failed = True
+        print("FAIL: tasks left behind after teardown:")
+        for task in leftover_tasks:
+            print(f"  {task!r}")
+    if extra_threads > 0:
+        failed = True
+        print("FAIL: threads left behind after teardown:")
+        for thread in threading.enumerate():
+            print(f"  {thread.name}")
+
+    print("FAIL" if failed else "PASS")
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.warmup >= args.polls:
+        print("--warmup must be smaller than --polls")
+        return 2
+    # Failure streaks are the point; a warning per failed poll is not.
+    logging.getLogger("custom_components.local_fcsp").setLevel(logging.CRITICAL)
+    tracemalloc.start()
+    try:
+        return run(soak(args))
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
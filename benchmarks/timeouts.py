@@ -0,0 +1,113 @@
+"""Adaptive timeouts against a charger that stops answering, through the real fcsp_api.
+
+The deadline each endpoint learns only helps if a timeout is noticed as one. fcsp_api sets the
+deadline as its socket timeout, so the socket gives up first, and fcsp_api re-raises requests'
+ReadTimeout as an FCSPConnectionError. asyncio's backstop, a little later, never fires. So the
+client has to recognise the timeout underneath, or the backoff never engages and a link that
+got slower than its learned deadline times out on every call.
+
+This starts a local server that accepts connections and never says a word, gives a real
+fcsp_api FCSP client (in an FcspClient) a few quick round trips' worth of history, then
+connects to the silent server over and over. Every call must count as a timeout, and the
+deadline must back off from one call to the next, up to the configured timeout.
+
+    python benchmarks/timeouts.py
+    python benchmarks/timeouts.py --calls 6 --timeout 10
+
+Exits non-zero when a timeout goes unnoticed or the deadline doesn't back off.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from fcsp_api import FCSP
+
+from _harness import StubHass, run
+from custom_components.local_fcsp.client import FcspClient, TokenBucket
+from custom_components.local_fcsp.const import ADAPTIVE_TIMEOUT_GRACE, ADAPTIVE_TIMEOUT_MIN_SAMPLES
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=4, help="calls to the silent server")
+    parser.add_argument("--rtt", type=float, default=0.2, help="round trip (s) the history is seeded with")
+    parser.add_argument("--floor", type=float, default=0.25, help="timeout floor (s)")
+    parser.add_argument("--timeout", type=float, default=4.0, help="configured timeout (s): the ceiling")
+    return parser.parse_args(argv)
+
+
+async def _silent_server():
+    """Accepts, never answers, hangs up when the client does."""
+
+    async def handle(reader, writer):
+        await reader.read()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+async def bench(args) -> int:
+    server = await _silent_server()
+    port = server.sockets[0].getsockname()[1]
+    hass = StubHass(asyncio.get_running_loop())
+    client = FcspClient(
+        hass,
+        FCSP(host="127.0.0.1", devkey="devkey", port=port, timeout=args.timeout),
+        TokenBucket(requests_per_minute=1e12, burst=10**9),
+        timeout=args.timeout,
+        timeout_floor=args.floor,
+        workers=1,
+    )
+    # A charger that used to answer quickly: enough history to trust the estimate.
+    estimator = client._estimator("connect")
+    for _ in range(ADAPTIVE_TIMEOUT_MIN_SAMPLES):
+        estimator.observe(args.rtt)
+
+    failed = False
+    deadlines = []
+    try:
+        for call in range(1, args.calls + 1):
+            deadline = estimator.deadline
+            deadlines.append(deadline)
+            started = time.monotonic()
+            try:
+                await client.async_connect()
+            except Exception as err:
+                outcome = type(err).__name__
+            else:
+                outcome = "answered?!"
+                failed = True
+            elapsed = time.monotonic() - started
+            print(
+                f"  call {call}: deadline {deadline:.2f}s, failed after {elapsed:.2f}s ({outcome}), "
+                f"timeouts counted {estimator.timeouts}"
+            )
+            if estimator.timeouts != call:
+                failed = True
+                print("FAIL: that timeout wasn't counted as one")
+            if elapsed > deadline + ADAPTIVE_TIMEOUT_GRACE:
+                failed = True
+                print("FAIL: the call outlived its deadline and the grace period")
+    finally:
+        await client.async_close()
+        server.close()
+        await server.wait_closed()
+        hass.close()
+
+    backed_off = all(later > earlier or later == args.timeout for earlier, later in zip(deadlines, deadlines[1:]))
+    print(f"deadlines: {', '.join(f'{d:.2f}s' for d in deadlines)} (ceiling {args.timeout:.1f}s)")
+    if not backed_off:
+        failed = True
+        print("FAIL: the deadline didn't back off after timeouts")
+    print("FAIL" if failed else "PASS")
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    return run(bench(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,10 +3,15 @@
 # Yes, I said "VIC". That stands for Queenie Octavia Christina Deerhart, a Very Important Collie.
 
 import logging
+from datetime import timedelta
+from functools import partial
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.util import slugify
 from fcsp_api import FCSP
 from .const import (
     DOMAIN,
+    PLATFORMS,
     DEFAULT_HOST,
     DEFAULT_DEVKEY,
     MIN_TIMEOUT,
@@ -15,10 +20,29 @@ from .const import (
     DEFAULT_SCAN_INTERVAL,
     CONF_SCAN_INTERVAL,
     CONF_API_TIMEOUT,
+    CONF_REQUESTS_PER_MINUTE,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    CONF_SKIP_UNCHANGED,
+    DEFAULT_SKIP_UNCHANGED,
+    SIGNAL_OPTIONS_UPDATED,
+    CONF_TIMEOUT_FLOOR,
+    DEFAULT_TIMEOUT_FLOOR,
+    CONF_EXECUTOR_WORKERS,
+    DEFAULT_EXECUTOR_WORKERS,
 )
 
 from .cache import LocalFcspCache
+from .client import FcspClient, async_claim_session, async_get_rate_limiter
+from .config_flow import ConfigFlow
 from .coordinator import FcspDataUpdateCoordinator
+from .journal import OutageJournal, async_remove_journal
+from .load import LoadMonitor
+from .migration import async_migrate_v1_to_v2
+from .planner import FetchPlanner
+from .probe import LivenessProbe
+from .services import async_setup_services
+from .websocket_api import async_setup_websocket
+from .statistics import HourlyStatistics, async_remove_statistics_store
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -27,9 +51,38 @@ async def async_setup(hass, config):
     """
     Initial setup of the Local FCSP integration.
 
-    Sets up a place to store our frozen peas (old data).
+    Sets up a place to store our frozen peas (old data), and registers our services
+    and the local_fcsp/subscribe websocket command.
     """
-    hass.data.setdefault(DOMAIN, {})
+    # Loaded entries' coordinators, kept apart from the bookkeeping (stations, rate limiters,
+    # parked sessions) so nothing that looks up an entry ID can land on one of those.
+    hass.data.setdefault(DOMAIN, {}).setdefault("coordinators", {})
+    async_setup_services(hass)
+    async_setup_websocket(hass)
+    return True
+
+async def async_migrate_entry(hass, entry):
+    """
+    Migrate an old config entry to the current version.
+
+    Version 2 moved the legacy entity/device clean-up out of sensor setup.
+    It runs exactly once per entry; the bumped version is the proof it happened.
+    """
+    if entry.version > ConfigFlow.VERSION:
+        # Someone's been time travelling with a newer release. We can't downgrade.
+        _LOGGER.error(
+            "Cannot migrate FCSP entry %s from future version %s",
+            entry.entry_id,
+            entry.version,
+        )
+        return False
+
+    if entry.version == 1:
+        _LOGGER.debug("Migrating FCSP entry %s from version 1", entry.entry_id)
+        await async_migrate_v1_to_v2(hass, entry)
+        hass.config_entries.async_update_entry(entry, version=2)
+
+    _LOGGER.info("Migrated FCSP entry %s to version %s", entry.entry_id, entry.version)
     return True
 
 async def async_setup_entry(hass, entry):
@@ -37,59 +90,250 @@ async def async_setup_entry(hass, entry):
     Set up the FCSP client using configuration from a config entry.
 
     Loads cached data so we can show stale data (frozen peas) immediately,
-    then kicks off a background refresh to get fresh data.
+    then kicks off a background refresh to get fresh data. If another entry
+    already polls the same station, this one just shows that entry's data.
     """
     host = entry.data.get("host", DEFAULT_HOST)
     devkey = entry.data.get("devkey", DEFAULT_DEVKEY)
     port = entry.data.get("port", 443)
-    timeout = max(entry.data.get(CONF_API_TIMEOUT, API_TIMEOUT), MIN_TIMEOUT)
+    timeout = _get_timeout(entry)
+
+    # One charger, one poller: same serial or same address means the same station.
+    stations = hass.data[DOMAIN].setdefault("stations", {})
+    keys = _station_keys(entry, host, port)
+    shared = next((stations[key] for key in keys if key in stations), None)
+    if shared is not None:
+        return await _async_setup_shared_entry(hass, entry, shared, keys, host)
 
     _LOGGER.debug(f"Setting up FCSP client with host={host}, devkey={devkey}, port={port}, timeout={timeout}")
 
-    fcsp = FCSP(host=host, devkey=devkey, port=port, timeout=timeout)
+    # One request budget per station, shared with anything else that talks to it.
+    requests_per_minute = _get_option(entry, CONF_REQUESTS_PER_MINUTE, DEFAULT_REQUESTS_PER_MINUTE)
+    limiter = async_get_rate_limiter(hass, host, requests_per_minute)
+
+    # Straight out of the config flow? Then we've already said hello, and have charger info to prove it.
+    handoff = async_claim_session(hass, host)
+    if handoff is not None:
+        client, prefetched = handoff
+        client.workers = _get_option(entry, CONF_EXECUTOR_WORKERS, DEFAULT_EXECUTOR_WORKERS)
+        _LOGGER.debug("Reusing the config flow's FCSP session for %s", host)
+    else:
+        prefetched = None
+
+        # Also used to start afresh if a call ever wedges a worker thread.
+        def fcsp_factory():
+            return FCSP(host=host, devkey=devkey, port=port, timeout=timeout)
+
+        client = FcspClient(
+            hass,
+            fcsp_factory(),
+            limiter,
+            timeout=timeout,
+            timeout_floor=_get_option(entry, CONF_TIMEOUT_FLOOR, DEFAULT_TIMEOUT_FLOOR),
+            fcsp_factory=fcsp_factory,
+            workers=_get_option(entry, CONF_EXECUTOR_WORKERS, DEFAULT_EXECUTOR_WORKERS),
+        )
 
-    try:
-        await hass.async_add_executor_job(fcsp.connect)
-    except Exception as err:
-        _LOGGER.error(f"Failed to connect to FCSP device: {err}")
-        raise ConfigEntryNotReady from err
+        try:
+            await client.async_connect()
+        except Exception as err:
+            _LOGGER.error(f"Failed to connect to FCSP device: {err}")
+            await client.async_close()
+            raise ConfigEntryNotReady from err
 
     # Load cached data (frozen peas > no peas)
     cache = LocalFcspCache(hass)
     cached_data = await cache.load()
 
-    # Get scan interval, falling back on defaults, and enforce minimum
-    scan_interval = max(
-        entry.options.get(CONF_SCAN_INTERVAL, entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)),
-        MIN_SCAN_INTERVAL,
-    )
+    scan_interval = _get_scan_interval(entry)
 
     # Create our coordinator — it handles live data fetch, cache saving, and exposes .data for sensors.
     coordinator = FcspDataUpdateCoordinator(
         hass=hass,
         config_entry=entry,
-        fcsp=fcsp,
+        client=client,
         cache_store=cache,
         cached_data=cached_data,
         scan_interval=scan_interval,
+        skip_unchanged=_get_option(entry, CONF_SKIP_UNCHANGED, DEFAULT_SKIP_UNCHANGED),
     )
 
+    # The station (client, worker threads, timers, the lot) goes with its last entry, even if
+    # setup fails part way and unload never gets that far — so this goes in before anything starts.
+    entry.async_on_unload(partial(_async_release_station, hass, entry, coordinator))
+
+    if prefetched:
+        coordinator.seed(prefetched)
+
+    # Only poll the endpoints an enabled entity actually reads.
+    coordinator.planner = FetchPlanner(hass, entry, coordinator)
+    coordinator.planner.async_start()
+
+    # Knock on the door between polls, so we notice a vanished charger in seconds, not minutes.
+    coordinator.probe = LivenessProbe(hass, host, port, on_change=coordinator.async_set_reachable)
+    coordinator.probe.async_start()
+
+    # When Home Assistant is struggling, poll what matters and let the rest wait.
+    coordinator.load = LoadMonitor(hass, on_change=coordinator.async_set_busy)
+    coordinator.load.async_start()
+
+    # Every power cut, kept for as long as you like — not just as long as the recorder does.
+    coordinator.journal = OutageJournal(hass, _station_id(entry))
+    await coordinator.journal.async_load()
+    coordinator.async_add_listener(partial(coordinator.journal.async_observe, coordinator))
+
+    # Hourly aggregates straight into long-term statistics, so dashboards needn't re-add the state history.
+    # No recorder, no statistics; the charger still gets polled.
+    if "recorder" in hass.config.components:
+        coordinator.statistics = HourlyStatistics(hass, _station_id(entry), entry.title)
+        await coordinator.statistics.async_start()
+        coordinator.async_add_listener(partial(coordinator.statistics.async_observe, coordinator))
+    else:
+        _LOGGER.debug("Recorder not loaded; skipping FCSP hourly statistics for %s", host)
+
     # Store the coordinator so sensors and other platforms can access it.
-    hass.data[DOMAIN][entry.entry_id] = coordinator
+    hass.data[DOMAIN]["coordinators"][entry.entry_id] = coordinator
+    for key in keys:
+        stations[key] = coordinator
 
     # Kick off the first refresh in the background — no blocking HA startup!
-    hass.async_create_task(coordinator.async_refresh())
+    # Tied to the entry, so an unload that beats it to the finish line cancels it.
+    entry.async_create_background_task(hass, coordinator.async_refresh(), "local_fcsp first refresh")
 
     # Forward setup to sensor and binary_sensor platforms (e.g. your GridDown entity)
-    await hass.config_entries.async_forward_entry_setups(entry, ["sensor", "binary_sensor"])
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    # Options changes are applied live — no reload, no reconnect, no entity teardown.
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
+    return True
 
+async def _async_setup_shared_entry(hass, entry, coordinator, keys, host):
+    """Another entry for a station we already poll: same session, same fetches, same cache, its own entities."""
+    _LOGGER.info(
+        "FCSP entry %s is the same station as entry %s; sharing its poller",
+        entry.entry_id,
+        coordinator.entry_ids[0],
+    )
+    # A session the config flow parked for us isn't needed; put it away rather than leave it running.
+    handoff = async_claim_session(hass, host)
+    if handoff is not None:
+        await handoff[0].async_close()
+
+    coordinator.async_attach(entry)
+    hass.data[DOMAIN]["coordinators"][entry.entry_id] = coordinator
+    # It may have been found by serial alone (new address) or address alone (serial not known yet).
+    stations = hass.data[DOMAIN]["stations"]
+    for key in keys:
+        stations.setdefault(key, coordinator)
+    entry.async_on_unload(partial(_async_release_station, hass, entry, coordinator))
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
     return True
 
+def _station_keys(entry, host, port):
+    """What makes two entries the same station: the charger's serial, or its address."""
+    keys = [f"host:{host}:{port}"]
+    if entry.unique_id:
+        keys.insert(0, f"serial:{entry.unique_id}")
+    return keys
+
+def _station_id(entry):
+    """What per-station files are named after: the serial, or the address until we know it."""
+    if entry.unique_id:
+        return slugify(entry.unique_id)
+    return slugify(f"{entry.data.get('host', DEFAULT_HOST)}_{entry.data.get('port', 443)}")
+
+async def _async_release_station(hass, entry, coordinator):
+    """This entry's done with its station; the last one out shuts it down. Safe to call twice."""
+    if entry.entry_id not in coordinator.entry_ids:
+        return
+    if not coordinator.async_detach(entry.entry_id):
+        return
+    stations = hass.data[DOMAIN].get("stations", {})
+    for key in [key for key, station in stations.items() if station is coordinator]:
+        del stations[key]
+    await coordinator.async_shutdown()
+
+async def async_update_options(hass, entry):
+    """
+    Apply changed options to the running entry.
+
+    Timers, timeouts and budgets are retuned in place. The sensor platform hears
+    about it over the dispatcher, adds or removes debug sensors, and rewrites the
+    Last Updated sensors so a new time format shows up straight away.
+    """
+    coordinator = hass.data[DOMAIN]["coordinators"].get(entry.entry_id)
+    if coordinator is None:
+        return
+    if coordinator.config_entry is not None and coordinator.config_entry.entry_id != entry.entry_id:
+        # A shared station polls on its first entry's options; this entry's only change what it shows.
+        _LOGGER.debug(
+            "FCSP entry %s shares entry %s's poller; polling options come from that entry",
+            entry.entry_id,
+            coordinator.config_entry.entry_id,
+        )
+        async_dispatcher_send(hass, SIGNAL_OPTIONS_UPDATED.format(entry.entry_id))
+        return
+
+    coordinator.update_interval = timedelta(seconds=_get_scan_interval(entry))
+    coordinator.client.timeout = _get_timeout(entry)
+    coordinator.client.timeout_floor = _get_option(entry, CONF_TIMEOUT_FLOOR, DEFAULT_TIMEOUT_FLOOR)
+    coordinator.client.limiter.requests_per_minute = _get_option(
+        entry, CONF_REQUESTS_PER_MINUTE, DEFAULT_REQUESTS_PER_MINUTE
+    )
+    coordinator.client.workers = _get_option(entry, CONF_EXECUTOR_WORKERS, DEFAULT_EXECUTOR_WORKERS)
+    coordinator.skip_unchanged = _get_option(entry, CONF_SKIP_UNCHANGED, DEFAULT_SKIP_UNCHANGED)
+
+    _LOGGER.debug(
+        "Applied FCSP options for entry %s: interval=%s, timeout=%s",
+        entry.entry_id,
+        coordinator.update_interval,
+        coordinator.client.timeout,
+    )
+    async_dispatcher_send(hass, SIGNAL_OPTIONS_UPDATED.format(entry.entry_id))
+
+def _get_option(entry, key, default):
+    """Options win over the original setup data, which wins over the default."""
+    return entry.options.get(key, entry.data.get(key, default))
+
+def _get_scan_interval(entry):
+    """Scan interval, falling back on defaults, with the minimum enforced."""
+    return max(_get_option(entry, CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL), MIN_SCAN_INTERVAL)
+
+def _get_timeout(entry):
+    """API timeout, falling back on defaults, with the minimum enforced."""
+    return max(_get_option(entry, CONF_API_TIMEOUT, API_TIMEOUT), MIN_TIMEOUT)
+
 async def async_unload_entry(hass, entry):
     """
     Unload a config entry and clean up.
+
+    Platforms go first; if they won't, nothing else is touched and the entry stays loaded.
+    Then, if no other entry shares the station, the coordinator shuts down: capture, timers,
+    probe, load monitor, planner, journal, statistics, in-flight calls, client session,
+    worker threads, cache.
     """
-    await hass.config_entries.async_forward_entry_unload(entry, "sensor")
-    await hass.config_entries.async_forward_entry_unload(entry, "binary_sensor")
-    hass.data[DOMAIN].pop(entry.entry_id, None)
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if not unload_ok:
+        return False
+    coordinator = hass.data[DOMAIN]["coordinators"].pop(entry.entry_id, None)
+    if coordinator is not None:
+        await _async_release_station(hass, entry, coordinator)
     return True
+
+async def async_remove_entry(hass, entry):
+    """
+    The entry's been deleted, not just unloaded: its station's outage journal and unimported
+    statistics go with it. Statistics already in the recorder stay, as for any deleted integration.
+
+    Unless another entry still shows the same station, in which case the history is still theirs.
+    """
+    station = _station_id(entry)
+    others = [other for other in hass.config_entries.async_entries(DOMAIN) if other.entry_id != entry.entry_id]
+    if any(_station_id(other) == station for other in others):
+        _LOGGER.debug("FCSP station %s is still shown by another entry; keeping its history", station)
+        return
+    await async_remove_journal(hass, station)
+    await async_remove_statistics_store(hass, station)
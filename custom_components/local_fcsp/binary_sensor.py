@@ -1,10 +1,11 @@
 import logging
 from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.core import callback
 
-from .const import DOMAIN
+from .const import DOMAIN, SIGNAL_REACHABILITY
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,7 +27,7 @@ class FCSPOnlineBinarySensor(CoordinatorEntity, BinarySensorEntity):
     @property
     def is_on(self) -> bool:
         """Return true if the device is online"""
-        val = not self.coordinator.offline
+        val = self.coordinator.online
         _LOGGER.debug("FCSP connectivity state is %s", val)
         return val
         
@@ -35,6 +36,22 @@ class FCSPOnlineBinarySensor(CoordinatorEntity, BinarySensorEntity):
         """Return the appropriate icon based on online state."""
         return self._attr_icon_on if self.is_on else self._attr_icon_off
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # The probe knows long before the next full poll does. Its round trip lives on the Probe
+        # Latency sensor, not here, so this only writes when reachability actually flips.
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_REACHABILITY.format(self._entry_id),
+                self._handle_reachability,
+            )
+        )
+
+    @callback
+    def _handle_reachability(self, _reachable: bool) -> None:
+        self.async_write_ha_state()
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Respond to data updates from the coordinator."""
@@ -44,14 +61,11 @@ class FCSPOnlineBinarySensor(CoordinatorEntity, BinarySensorEntity):
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the Online binary sensor from a config entry."""
-    coordinator = hass.data[DOMAIN].get(entry.entry_id)
+    coordinator = hass.data[DOMAIN]["coordinators"].get(entry.entry_id)
     if not coordinator:
         _LOGGER.error("No coordinator found for entry %s", entry.entry_id)
         return
 
 
     _LOGGER.debug("Creating Online BinarySensor for entry %s", entry.entry_id)
-    async_add_entities(
-        [FCSPOnlineBinarySensor(coordinator, entry.entry_id)],
-        update_before_add=True,
-    )
+    async_add_entities([FCSPOnlineBinarySensor(coordinator, entry.entry_id)])
@@ -1,12 +1,15 @@
 from typing import Any, Optional
 from homeassistant.helpers.storage import Store
 
+from .const import CACHE_SAVE_DELAY
+
 class LocalFcspCache:
     """Persistent cache for local FCSP data to smooth startup and avoid 'unavailable' states."""
 
     def __init__(self, hass, version: int = 1) -> None:
         self._store = Store(hass, version, "local_fcsp")
         self._cache: dict = {}
+        self._dirty = False
 
     async def load(self) -> dict:
         """Load cached data asynchronously."""
@@ -15,9 +18,19 @@ class LocalFcspCache:
         return self._cache
 
     async def save(self, data: dict) -> None:
-        """Save data to cache asynchronously."""
+        """Save data to cache. The write itself is put off a little, so a burst of polls is one write."""
         self._cache = data
-        await self._store.async_save(data)
+        self._dirty = True
+        self._store.async_delay_save(self._data_to_save, CACHE_SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Write out a pending save now (on unload), instead of never."""
+        if self._dirty:
+            await self._store.async_save(self._data_to_save())
+
+    def _data_to_save(self) -> dict:
+        self._dirty = False
+        return self._cache
 
     def get(self, key: str, default: Optional[Any] = None) -> Any:
         """Get cached value by key."""
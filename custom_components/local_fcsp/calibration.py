@@ -0,0 +1,147 @@
+# CALIBRATION: Measure twice, poll once. Nobody knows what timeout their charger's Wi-Fi needs,
+# so everybody takes the defaults — a minute each — which is too slow to notice a dead charger on
+# a good link and too impatient on a bad one. Calibration times a few rounds of every endpoint and
+# suggests an interval and a timeout from what it saw, never below the device-protection minimums.
+#
+# Calls go through the station's own client, so the request budget paces them like any poll.
+# Every run is kept (per station, last few), so the next one can say "network info used to take
+# 0.4 s, now it takes 3".
+
+import logging
+import math
+import statistics
+import time
+
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as hass_dt
+
+from .client import FcspClientClosedError, FcspThrottledError
+from .const import (
+    CALIBRATION_DUTY_FACTOR,
+    CALIBRATION_ERROR_RATE,
+    CALIBRATION_HISTORY,
+    CALIBRATION_MAX_SECONDS,
+    CALIBRATION_ROUNDS,
+    CALIBRATION_STORE_VERSION,
+    CALIBRATION_TIMEOUT_FACTOR,
+    DOMAIN,
+    ENDPOINTS,
+    MIN_SCAN_INTERVAL,
+    MIN_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_calibrate(hass, client, station: str, requests_per_minute: float) -> dict:
+    """Time CALIBRATION_ROUNDS calls of every endpoint, suggest settings, and remember the run.
+
+    `station` is whatever identifies the charger across runs (its serial, or failing that its host).
+    Returns the run: per-endpoint timings, the suggestion (None if nothing answered), and the
+    previous run's medians for comparison.
+    """
+    samples = {endpoint: [] for endpoint in ENDPOINTS}
+    errors = {endpoint: 0 for endpoint in ENDPOINTS}
+    throttled = 0
+    give_up_at = time.monotonic() + CALIBRATION_MAX_SECONDS
+
+    for _ in range(CALIBRATION_ROUNDS):
+        for endpoint in ENDPOINTS:
+            if time.monotonic() > give_up_at:
+                break
+            try:
+                _response, elapsed = await client.async_get_timed(endpoint)
+            except FcspClientClosedError:
+                raise
+            except FcspThrottledError:
+                throttled += 1  # Our budget said no, not the charger; nothing learned either way.
+                continue
+            except Exception as err:
+                _LOGGER.debug("FCSP calibration call to %s failed: %s", endpoint, err)
+                errors[endpoint] += 1
+                continue
+            samples[endpoint].append(elapsed)
+
+    run = {
+        "at": hass_dt.utcnow().isoformat(),
+        "endpoints": {
+            endpoint: {
+                "calls": len(samples[endpoint]) + errors[endpoint],
+                "errors": errors[endpoint],
+                "median": round(statistics.median(samples[endpoint]), 3) if samples[endpoint] else None,
+                "worst": round(max(samples[endpoint]), 3) if samples[endpoint] else None,
+            }
+            for endpoint in ENDPOINTS
+        },
+        "throttled": throttled,
+        "suggested": suggest(samples, errors, requests_per_minute),
+    }
+
+    history = await CalibrationStore(hass).async_add(station, dict(run))
+    run["previous"] = history[-1]["endpoints"] if history else None
+    _LOGGER.info("FCSP calibration for %s: %s", station, run["suggested"])
+    return run
+
+
+def suggest(samples: dict, errors: dict, requests_per_minute: float) -> dict | None:
+    """Interval and timeout from measured round trips, or None if there's nothing to go on."""
+    answered = [seconds for endpoint_samples in samples.values() for seconds in endpoint_samples]
+    if not answered:
+        return None
+    calls = len(answered) + sum(errors.values())
+    error_rate = sum(errors.values()) / calls
+
+    # A full poll takes the sum of the typical calls; a timeout has to outlast the slowest.
+    poll_seconds = sum(statistics.median(s) for s in samples.values() if s)
+    timeout = max(MIN_TIMEOUT, math.ceil(max(answered) * CALIBRATION_TIMEOUT_FACTOR))
+    interval = max(
+        MIN_SCAN_INTERVAL,
+        poll_seconds * CALIBRATION_DUTY_FACTOR,
+        # Every poll is a connect plus the endpoints, and they all have to fit in the budget.
+        60 * (len(ENDPOINTS) + 1) / requests_per_minute,
+    )
+    if error_rate > CALIBRATION_ERROR_RATE:
+        # A link that drops calls does better with more breathing room, not more retries.
+        interval *= 2
+    return {
+        "scan_interval": int(math.ceil(interval / 5) * 5),
+        "timeout": int(timeout),
+        "error_rate": round(error_rate, 3),
+    }
+
+
+def describe(run: dict) -> str:
+    """The run as a few lines of text for the flow's form."""
+    lines = []
+    for endpoint, timing in run["endpoints"].items():
+        if timing["median"] is None:
+            line = f"{endpoint}: no answer ({timing['errors']} of {timing['calls']} failed)"
+        else:
+            line = (
+                f"{endpoint}: typically {timing['median']:.2f} s, slowest {timing['worst']:.2f} s, "
+                f"{timing['errors']} of {timing['calls']} failed"
+            )
+            before = (run.get("previous") or {}).get(endpoint, {}).get("median")
+            if before:
+                line += f" (last time {before:.2f} s)"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+class CalibrationStore:
+    """The last few calibration runs per station, oldest first."""
+
+    def __init__(self, hass) -> None:
+        self._store = Store(hass, CALIBRATION_STORE_VERSION, f"{DOMAIN}_calibration")
+
+    async def async_load(self, station: str) -> list:
+        data = await self._store.async_load() or {}
+        return data.get(station, [])
+
+    async def async_add(self, station: str, run: dict) -> list:
+        """Keep a run; returns the ones before it."""
+        data = await self._store.async_load() or {}
+        history = data.get(station, [])
+        data[station] = (history + [run])[-CALIBRATION_HISTORY:]
+        await self._store.async_save(data)
+        return history
@@ -0,0 +1,203 @@
+# CAPTURE: The flight recorder. "My charger says State 3 and then CF07 and then the sensors go weird"
+# is a lot easier to fix with a recording of exactly what the charger said, and when.
+#
+# CaptureRecorder hangs off an FcspClient (client.recorder) for a set time and writes every raw
+# response — and every error — as one JSON line, with timings, redacted like a diagnostics download.
+# ReplayFcsp plays such a file back as a drop-in for fcsp_api.FCSP, so the real coordinator and
+# entities can be driven from it: at the speed it was recorded, faster, or as fast as they'll go.
+
+import asyncio
+import copy
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import timedelta
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as hass_dt
+
+from .const import (
+    CAPTURE_BACKUPS,
+    CAPTURE_FLUSH_LINES,
+    CAPTURE_MAX_BYTES,
+    ENDPOINTS,
+    REDACT_KEYS,
+)
+from .journal import rotate_file, rotated_paths
+
+_LOGGER = logging.getLogger(__name__)
+
+CAPTURE_FORMAT = 1
+
+
+class CaptureRecorder:
+    """Records one coordinator's raw FCSP traffic to a rotating JSON-lines file."""
+
+    def __init__(self, hass: HomeAssistant, coordinator, entry_id: str, duration: timedelta) -> None:
+        self._hass = hass
+        self._coordinator = coordinator
+        self._entry_id = entry_id
+        self._duration = duration
+        stamp = hass_dt.now().strftime("%Y%m%d-%H%M%S")
+        self.path = hass.config.path(f"local_fcsp_capture_{entry_id}_{stamp}.jsonl")
+        self._started = None
+        self._lines = []
+        self._flush_lock = asyncio.Lock()
+        self._flushes = set()
+        self._unsub_timer = None
+        self.records = 0
+
+    @callback
+    def start(self) -> None:
+        self._started = time.monotonic()
+        self._lines.append({
+            "capture": CAPTURE_FORMAT,
+            "started": hass_dt.utcnow().isoformat(),
+            "scan_interval": self._coordinator.update_interval.total_seconds(),
+        })
+        self._coordinator.client.recorder = self
+        self._unsub_timer = async_call_later(self._hass, self._duration, self._async_on_timer)
+        _LOGGER.info("Capturing FCSP traffic for entry %s to %s", self._entry_id, self.path)
+
+    @callback
+    def record(self, call: str, elapsed: float, response=None, error: BaseException | None = None) -> None:
+        """Client hook: one line per call. Cheap on the loop; the disk work happens in batches."""
+        line = {"t": round(time.monotonic() - self._started, 3), "call": call, "ms": round(elapsed * 1000, 1)}
+        if error is not None:
+            line["error"] = {"type": type(error).__name__, "message": str(error)}
+        else:
+            line["response"] = async_redact_data(response, REDACT_KEYS) if isinstance(response, (dict, list)) else response
+        self._lines.append(line)
+        self.records += 1
+        if len(self._lines) >= CAPTURE_FLUSH_LINES:
+            task = self._hass.async_create_background_task(self._async_flush(), name="local_fcsp capture flush")
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _async_on_timer(self, _now) -> None:
+        self._unsub_timer = None
+        await self.async_stop()
+
+    async def async_stop(self) -> None:
+        """Stop recording and write out whatever's buffered."""
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+        if self._coordinator.client.recorder is self:
+            self._coordinator.client.recorder = None
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self._async_flush()
+        if self._coordinator.capture is self:
+            self._coordinator.capture = None
+        _LOGGER.info("FCSP capture for entry %s finished: %d calls in %s", self._entry_id, self.records, self.path)
+
+    async def _async_flush(self) -> None:
+        async with self._flush_lock:
+            lines, self._lines = self._lines, []
+            if lines:
+                await self._hass.async_add_executor_job(_append_lines, self.path, lines)
+
+
+def _append_lines(path: str, lines: list) -> None:
+    text = "".join(json.dumps(line, separators=(",", ":"), default=str) + "\n" for line in lines)
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        size = 0
+    if size and size + len(text) > CAPTURE_MAX_BYTES:
+        rotate_file(path, CAPTURE_BACKUPS)
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(text)
+
+
+def load_capture(path: str) -> tuple[dict, list]:
+    """Read a capture (and any rotated parts of it, oldest first). Returns (header, call records)."""
+    header = {}
+    records = []
+    for part in rotated_paths(path, CAPTURE_BACKUPS):
+        if not os.path.exists(part):
+            continue
+        with open(part, encoding="utf-8") as handle:
+            for line in handle:
+                record = json.loads(line)
+                if "capture" in record:
+                    header = record
+                else:
+                    records.append(record)
+    return header, records
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+class ReplayExhausted(EOFError):
+    """The capture has no more answers for this call."""
+
+
+_REPLAYED_ERRORS = {}
+
+
+def _replayed_error(type_name: str) -> type:
+    """An exception class with the recorded name, so timeouts still look like timeouts (see client._is_timeout)."""
+    if type_name not in _REPLAYED_ERRORS:
+        _REPLAYED_ERRORS[type_name] = type(type_name, (Exception,), {"__module__": __name__})
+    return _REPLAYED_ERRORS[type_name]
+
+
+class ReplayFcsp:
+    """Synchronous stand-in for fcsp_api.FCSP that answers from a capture file.
+
+    Each call gets the next recorded answer for that call, in order. With `speed` > 0, each
+    call also takes as long as it did when recorded, divided by `speed`; 0 answers instantly.
+    """
+
+    _METHODS = {method: endpoint for endpoint, method in ENDPOINTS.items()}
+
+    def __init__(self, path: str, speed: float = 0.0, timeout: float = 30) -> None:
+        self.header, records = load_capture(path)
+        self.speed = speed
+        self.timeout = timeout
+        self._answers = {}
+        for record in records:
+            self._answers.setdefault(record["call"], deque()).append(record)
+        # A connect opens every poll, so connect timestamps are the poll schedule.
+        self._cycle_starts = deque(record["t"] for record in self._answers.get("connect", ()))
+        self.calls = 0
+
+    @property
+    def remaining_cycles(self) -> int:
+        return len(self._cycle_starts)
+
+    def next_cycle_offset(self) -> float | None:
+        """Seconds into the capture at which the next poll began, or None when we're done."""
+        return self._cycle_starts[0] if self._cycle_starts else None
+
+    def _answer(self, call: str):
+        queue = self._answers.get(call)
+        if not queue:
+            raise ReplayExhausted(f"Capture has no more {call} answers")
+        record = queue.popleft()
+        if call == "connect" and self._cycle_starts:
+            self._cycle_starts.popleft()
+        self.calls += 1
+        if self.speed > 0:
+            time.sleep(record["ms"] / 1000 / self.speed)
+        if "error" in record:
+            raise _replayed_error(record["error"]["type"])(record["error"]["message"])
+        return copy.deepcopy(record["response"])
+
+    def connect(self):
+        return self._answer("connect")
+
+    def __getattr__(self, name: str):
+        # get_charger_info and friends, straight from ENDPOINTS so new endpoints replay too.
+        endpoint = self._METHODS.get(name)
+        if endpoint is None:
+            raise AttributeError(name)
+        return lambda: self._answer(endpoint)
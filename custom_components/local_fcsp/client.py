@@ -0,0 +1,483 @@
+# CLIENT: The bouncer at the charger's front door.
+# fcsp_api is synchronous, and the charger is easily overwhelmed (ask me about CF fault codes).
+# Everything that wants to talk to a station — the coordinator, manual refreshes, the config flow,
+# diagnostics — goes through an FcspClient, which queues on a per-station token bucket first.
+
+import asyncio
+import itertools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import urllib3
+
+from .const import (
+    ADAPTIVE_TIMEOUT_GRACE,
+    ADAPTIVE_TIMEOUT_MIN_SAMPLES,
+    DEFAULT_EXECUTOR_WORKERS,
+    DEFAULT_REQUEST_BURST,
+    DEFAULT_TIMEOUT_FLOOR,
+    DOMAIN,
+    ENDPOINTS,
+    RATE_LIMIT_MAX_WAIT,
+    SESSION_HANDOFF_MAX_AGE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FcspThrottledError(Exception):
+    """Raised when a request is shed because the station's request budget is spent."""
+
+
+class FcspExecutorSaturatedError(Exception):
+    """Raised instead of queueing when every worker thread is stuck on an earlier call."""
+
+
+class FcspClientClosedError(Exception):
+    """Raised to callers still waiting on (or arriving at) a client that's been closed."""
+
+
+class TokenBucket:
+    """Token bucket rate limiter shared by every caller of one station.
+
+    Tokens refill at `requests_per_minute`, up to `burst`. A caller that finds the
+    bucket empty reserves the next token and queues for it, unless the wait would
+    exceed `max_wait` — then the request is shed and counted as throttled.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        burst: int = DEFAULT_REQUEST_BURST,
+        max_wait: float = RATE_LIMIT_MAX_WAIT,
+    ) -> None:
+        self._rate = requests_per_minute / 60.0
+        self._capacity = float(burst)
+        self._tokens = float(burst)
+        self._max_wait = max_wait
+        self._updated = time.monotonic()
+        self.granted = 0
+        self.delayed = 0
+        self.throttled = 0
+
+    @property
+    def requests_per_minute(self) -> float:
+        return self._rate * 60.0
+
+    @requests_per_minute.setter
+    def requests_per_minute(self, value: float) -> None:
+        self._refill()
+        self._rate = value / 60.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Take one token, queueing if needed. Raises FcspThrottledError when shed."""
+        self._refill()
+        # Reserve first, so callers queue in arrival order (tokens may go negative).
+        self._tokens -= 1
+        if self._tokens >= 0:
+            self.granted += 1
+            return
+
+        wait = -self._tokens / self._rate
+        if wait > self._max_wait:
+            self._tokens += 1
+            self.throttled += 1
+            raise FcspThrottledError(
+                f"Request budget exhausted ({self.requests_per_minute:g}/min); "
+                f"next slot in {wait:.0f}s"
+            )
+
+        self.delayed += 1
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            # Give the reservation back — nobody's coming to collect it.
+            self._tokens += 1
+            raise
+        self.granted += 1
+
+    @property
+    def stats(self) -> dict:
+        self._refill()
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_available": round(max(self._tokens, 0.0), 2),
+            "granted": self.granted,
+            "delayed": self.delayed,
+            "throttled": self.throttled,
+        }
+
+
+def async_get_rate_limiter(hass, host: str, requests_per_minute: float) -> TokenBucket:
+    """Return the shared token bucket for a station, creating it on first use."""
+    limiters = hass.data.setdefault(DOMAIN, {}).setdefault("rate_limiters", {})
+    limiter = limiters.get(host)
+    if limiter is None:
+        limiter = limiters[host] = TokenBucket(requests_per_minute)
+    elif limiter.requests_per_minute != requests_per_minute:
+        limiter.requests_per_minute = requests_per_minute
+    return limiter
+
+
+def async_stash_session(hass, host: str, client: "FcspClient", payloads: dict) -> None:
+    """Park a connected client and what it already fetched, for setup to pick up."""
+    sessions = hass.data.setdefault(DOMAIN, {}).setdefault("pending_sessions", {})
+    sessions[host] = (time.monotonic(), client, payloads)
+
+
+def async_claim_session(hass, host: str):
+    """Take the parked (client, payloads) for a station, if one is fresh enough. One use only."""
+    sessions = hass.data.get(DOMAIN, {}).get("pending_sessions", {})
+    parked = sessions.pop(host, None)
+    if parked is None:
+        return None
+    stashed_at, client, payloads = parked
+    if time.monotonic() - stashed_at > SESSION_HANDOFF_MAX_AGE:
+        # Too old to trust, but its threads and socket are still ours to put away.
+        hass.async_create_task(client.async_close())
+        return None
+    return client, payloads
+
+
+class LatencyEstimator:
+    """Smoothed round-trip time and variance for one endpoint, TCP retransmit-timer style.
+
+    deadline = srtt + 4 * rttvar, clamped between floor and ceiling. Until we have a few
+    samples the ceiling is used, so a slow-but-alive link never gets a false timeout on day one.
+    Each timeout doubles a backoff multiplier; the next answer resets it.
+    """
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+    MAX_BACKOFF = 8
+
+    def __init__(self, floor: float, ceiling: float) -> None:
+        self.floor = floor
+        self.ceiling = ceiling
+        self.srtt = None
+        self.rttvar = None
+        self.samples = 0
+        self.timeouts = 0
+        self._backoff = 1
+
+    def observe(self, seconds: float) -> None:
+        if self.srtt is None:
+            self.srtt = seconds
+            self.rttvar = seconds / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - seconds)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * seconds
+        self.samples += 1
+        self._backoff = 1
+
+    def on_timeout(self) -> None:
+        self.timeouts += 1
+        self._backoff = min(self._backoff * 2, self.MAX_BACKOFF)
+
+    @property
+    def deadline(self) -> float:
+        if self.samples < ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+            return self.ceiling
+        estimate = (self.srtt + self.K * self.rttvar) * self._backoff
+        return min(max(estimate, self.floor), self.ceiling)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "srtt": round(self.srtt, 3) if self.srtt is not None else None,
+            "rttvar": round(self.rttvar, 3) if self.rttvar is not None else None,
+            "deadline": round(self.deadline, 2),
+            "samples": self.samples,
+            "timeouts": self.timeouts,
+        }
+
+
+class FcspClient:
+    """Async wrapper around a synchronous FCSP client, gated by a TokenBucket.
+
+    Calls run on the client's own bounded thread pool with a hard asyncio deadline. A call
+    that blows its deadline while its thread is still busy has wedged that thread: the FCSP
+    object is rebuilt through `fcsp_factory` (when given), so the next call starts with a
+    clean session instead of talking over the stuck one.
+    """
+
+    _pool_ids = itertools.count(1)
+
+    def __init__(
+        self,
+        hass,
+        fcsp,
+        limiter: TokenBucket,
+        timeout: float,
+        timeout_floor: float = DEFAULT_TIMEOUT_FLOOR,
+        fcsp_factory=None,
+        workers: int = DEFAULT_EXECUTOR_WORKERS,
+    ) -> None:
+        self._hass = hass
+        self._fcsp = fcsp
+        self._fcsp_factory = fcsp_factory
+        self._limiter = limiter
+        # The configured timeout becomes the ceiling; each endpoint learns its own deadline below it.
+        self._ceiling = timeout
+        self._floor = min(timeout_floor, timeout)
+        self._latency = {}
+        # One conversation at a time. The scheduled poll and a manual refresh share a session,
+        # and fcsp_api was never meant to be talked over.
+        self._lock = asyncio.Lock()
+
+        # Our own threads, so a charger that hangs mid-read can't starve the rest of Home Assistant.
+        self._workers = workers
+        self._executor = None
+        self._busy = set()  # concurrent futures whose thread is running or queued
+        self._stuck = set()  # ...and those we've already given up on
+        self._waiters = set()  # the asyncio side of in-flight calls, so closing can let go of them
+        self._closed = False
+        self.calls = 0
+        self.stuck_calls = 0
+        self.recreated = 0
+        self.saturated = 0
+        self.peak_busy = 0
+
+        # Set by the local_fcsp.capture service: sees every raw response and error, with timings.
+        self.recorder = None
+
+    @property
+    def limiter(self) -> TokenBucket:
+        return self._limiter
+
+    @property
+    def timeout(self) -> float:
+        """The configured timeout: the ceiling for every adaptive deadline."""
+        return self._ceiling
+
+    @timeout.setter
+    def timeout(self, value: float) -> None:
+        self._ceiling = value
+        self._floor = min(self._floor, value)
+        for estimator in self._latency.values():
+            estimator.ceiling = value
+            estimator.floor = self._floor
+
+    @property
+    def timeout_floor(self) -> float:
+        return self._floor
+
+    @timeout_floor.setter
+    def timeout_floor(self, value: float) -> None:
+        self._floor = min(value, self._ceiling)
+        for estimator in self._latency.values():
+            estimator.floor = self._floor
+
+    @property
+    def latency_stats(self) -> dict:
+        return {name: estimator.stats for name, estimator in self._latency.items()}
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @workers.setter
+    def workers(self, value: int) -> None:
+        if value == self._workers:
+            return
+        self._workers = value
+        # A pool can't be resized in place. Retire it: wedged threads finish (or time out) on their own.
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @property
+    def executor_stats(self) -> dict:
+        return {
+            "workers": self._workers,
+            "busy": len(self._busy),
+            "stuck": len(self._stuck),
+            "peak_busy": self.peak_busy,
+            "calls": self.calls,
+            "stuck_calls": self.stuck_calls,
+            "client_recreated": self.recreated,
+            "saturated": self.saturated,
+        }
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def shutdown(self) -> None:
+        """Release the worker threads. Never blocks: a wedged thread is left to time out by itself."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def async_close(self) -> None:
+        """Let go of in-flight calls, release the threads and close the FCSP session. Safe to repeat."""
+        if self._closed:
+            return
+        self._closed = True
+        for waiter in list(self._waiters):
+            # Cancelling the asyncio side also cancels the call if it hasn't started; a running
+            # thread finishes into the void, and closing the session below hurries it along.
+            waiter.cancel()
+        self.shutdown()
+        await self._hass.async_add_executor_job(_close_fcsp, self._fcsp)
+
+    def _submit(self, func, *args):
+        if len(self._stuck) >= self._workers:
+            # Every thread is wedged; a new call would only queue behind them and time out too.
+            self.saturated += 1
+            raise FcspExecutorSaturatedError(
+                f"All {self._workers} FCSP worker threads are stuck on earlier calls"
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self._workers, thread_name_prefix=f"local_fcsp_{next(self._pool_ids)}"
+            )
+        future = self._executor.submit(func, *args)
+        self.calls += 1
+        self._busy.add(future)
+        self.peak_busy = max(self.peak_busy, len(self._busy))
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future) -> None:
+        # Fires on the worker thread; bookkeeping belongs on the loop.
+        try:
+            self._hass.loop.call_soon_threadsafe(self._release, future)
+        except RuntimeError:
+            pass  # The loop is gone (Home Assistant has stopped), and the bookkeeping with it.
+
+    def _release(self, future) -> None:
+        self._busy.discard(future)
+        if future in self._stuck:
+            self._stuck.discard(future)
+            _LOGGER.debug("A stuck FCSP worker thread came home")
+
+    def _abandon(self, future, name: str) -> None:
+        """The deadline passed. If the thread is still in there, it's stuck: start afresh."""
+        if future.cancel() or future.done():
+            return  # Never started, or finished in the nick of time. No thread left behind.
+        if self._closed:
+            return  # Closing already shut the session it's stuck on; nothing to rebuild for.
+        self.stuck_calls += 1
+        self._stuck.add(future)
+        _LOGGER.warning(
+            "FCSP %s is stuck past its deadline (%d of %d worker threads stuck)",
+            name,
+            len(self._stuck),
+            self._workers,
+        )
+        if self._fcsp_factory is not None:
+            wedged, self._fcsp = self._fcsp, self._fcsp_factory()
+            self.recreated += 1
+            # Closing its session under it is the best chance the stuck thread has of coming home.
+            self._hass.async_add_executor_job(_close_fcsp, wedged)
+
+    def _estimator(self, name: str) -> LatencyEstimator:
+        estimator = self._latency.get(name)
+        if estimator is None:
+            estimator = self._latency[name] = LatencyEstimator(self._floor, self._ceiling)
+        return estimator
+
+    async def _async_run(self, name: str, func, *args):
+        result, _elapsed = await self._async_timed(name, func, *args)
+        return result
+
+    async def _async_timed(self, name: str, func, *args) -> tuple:
+        """Run one call; returns (result, seconds the charger took). Queueing for budget or lock isn't counted."""
+        self._check_open()
+        await self._limiter.acquire()
+        async with self._lock:
+            self._check_open()
+            estimator = self._estimator(name)
+            deadline = estimator.deadline
+            # fcsp_api reads its timeout per request, so the socket gives up at the deadline and
+            # the executor thread comes home. wait_for, a little later, is the backstop.
+            self._fcsp.timeout = deadline
+            started = time.monotonic()
+            future = self._submit(func, *args)
+            waiter = asyncio.wrap_future(future)
+            self._waiters.add(waiter)
+            try:
+                result = await asyncio.wait_for(waiter, deadline + ADAPTIVE_TIMEOUT_GRACE)
+            except (asyncio.TimeoutError, TimeoutError) as err:
+                estimator.on_timeout()
+                self._abandon(future, name)
+                timeout_err = TimeoutError(f"FCSP {name} timed out after {deadline:.1f}s")
+                if self.recorder is not None:
+                    self.recorder.record(name, time.monotonic() - started, error=timeout_err)
+                raise timeout_err from err
+            except asyncio.CancelledError:
+                # Whoever was waiting went away (unload, shutdown); the thread may not have.
+                self._abandon(future, name)
+                if self._closed and not asyncio.current_task().cancelling():
+                    # It was us, closing: tell the caller so, rather than cancel a task that isn't ours.
+                    raise FcspClientClosedError(f"FCSP client closed during {name}") from None
+                raise
+            except Exception as err:
+                # The socket timing out in the thread counts the same as us giving up on it.
+                if _is_timeout(err):
+                    estimator.on_timeout()
+                if self.recorder is not None:
+                    self.recorder.record(name, time.monotonic() - started, error=err)
+                raise
+            finally:
+                self._waiters.discard(waiter)
+            elapsed = time.monotonic() - started
+            estimator.observe(elapsed)
+            if self.recorder is not None:
+                self.recorder.record(name, elapsed, response=result)
+            return result, elapsed
+
+    async def async_connect(self) -> None:
+        """(Re)establish the session with the station."""
+        await self._async_run("connect", self._call, "connect")
+
+    async def async_get(self, endpoint: str):
+        """Fetch a single endpoint by its coordinator data key (e.g. 'charger_info')."""
+        return await self._async_run(endpoint, self._call, ENDPOINTS[endpoint])
+
+    async def async_get_timed(self, endpoint: str) -> tuple:
+        """Like async_get, but returns (response, round-trip seconds) — for calibration."""
+        return await self._async_timed(endpoint, self._call, ENDPOINTS[endpoint])
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise FcspClientClosedError("FCSP client is closed")
+
+    def _call(self, method: str):
+        """Runs on a worker thread. Looks the FCSP object up only now, in case it was rebuilt while we queued."""
+        return getattr(self._fcsp, method)()
+
+
+def _close_fcsp(fcsp) -> None:
+    """Runs in the executor. Close whatever session the FCSP object holds, if it lets us."""
+    close = getattr(fcsp, "close", None) or getattr(getattr(fcsp, "session", None), "close", None)
+    if close is None:
+        return
+    try:
+        close()
+    except Exception as err:
+        _LOGGER.debug("Closing FCSP session failed: %s", err)
+
+
+# What a socket timing out looks like, depending on which layer noticed.
+_TIMEOUT_ERRORS = (TimeoutError, requests.exceptions.Timeout, urllib3.exceptions.TimeoutError)
+
+
+def _is_timeout(err: BaseException) -> bool:
+    """Did the call time out? fcsp_api re-raises requests' errors as FCSPConnectionError, so look down the chain."""
+    seen = set()
+    while err is not None and id(err) not in seen:
+        if isinstance(err, _TIMEOUT_ERRORS):
+            return True
+        seen.add(id(err))
+        err = err.__cause__ or err.__context__
+    return False
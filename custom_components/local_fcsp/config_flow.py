@@ -1,6 +1,11 @@
+import asyncio
+import logging
+
 import voluptuous as vol
+from fcsp_api import FCSP
 from homeassistant import config_entries
-from homeassistant.data_entry_flow import FlowResult
+from homeassistant.core import callback
+from homeassistant.data_entry_flow import AbortFlow, FlowResult
 from .const import (
     DOMAIN,
     CONF_SCAN_INTERVAL,
@@ -13,10 +18,28 @@ from .const import (
     DEFAULT_DEBUG,
     MIN_SCAN_INTERVAL,
     MIN_TIMEOUT,
+    CONF_REQUESTS_PER_MINUTE,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    MIN_REQUESTS_PER_MINUTE,
+    CONF_SKIP_UNCHANGED,
+    DEFAULT_SKIP_UNCHANGED,
+    CONF_TIMEOUT_FLOOR,
+    DEFAULT_TIMEOUT_FLOOR,
+    MIN_TIMEOUT_FLOOR,
+    CONF_EXECUTOR_WORKERS,
+    DEFAULT_EXECUTOR_WORKERS,
+    MIN_EXECUTOR_WORKERS,
+    MAX_EXECUTOR_WORKERS,
     CONF_TIME_FORMAT, 
     DEFAULT_TIME_FORMAT, 
     TIME_FORMAT_OPTIONS,
+    CONF_CALIBRATE,
 )
+from .calibration import async_calibrate, describe
+from .client import FcspClient, async_get_rate_limiter, async_stash_session
+from .discovery import async_discover_stations
+
+_LOGGER = logging.getLogger(__name__)
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Local FCSP.
@@ -26,15 +49,83 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     # You know, because you're not a Binar or Johnny Number Five.
     # But if you are, 01001000 01100101 01101100 01101100 01101111 (Hello in binary!)
 
-    VERSION = 1
+    # Version 2: legacy entity/device clean-up moved into async_migrate_entry.
+    VERSION = 2
+
+    def __init__(self) -> None:
+        # Discovery results live as long as the flow does: (devkey, port) -> {host: charger_info}.
+        self._discovered = {}
+        self._host = DEFAULT_HOST
+        self._devkey = DEFAULT_DEVKEY
+        self._port = 443
+        # Validated but not yet created, while the calibration step runs: (data, client, charger_info).
+        self._pending = None
+        self._calibrate_task = None
+        self._calibration = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Hand out the options flow, so the Configure button actually shows up."""
+        return OptionsFlowHandler()
 
     async def async_step_user(self, user_input=None) -> FlowResult:
-        """Handle the initial step."""
+        """Handle the initial step: go looking, or type the address in yourself."""
+        return self.async_show_menu(step_id="user", menu_options=["discover", "manual"])
+
+    async def async_step_discover(self, user_input=None) -> FlowResult:
+        """Sweep the local network for charge stations that answer to this devkey."""
+        errors = {}
+
+        if user_input is not None:
+            self._devkey = user_input["devkey"]
+            self._port = user_input["port"]
+            key = (self._devkey, self._port)
+
+            if key not in self._discovered:
+                stations = await async_discover_stations(self.hass, self._devkey, self._port)
+                configured = {entry.data.get("host") for entry in self._async_current_entries()}
+                stations = {host: info for host, info in stations.items() if host not in configured}
+                _LOGGER.debug("Discovery found %d new charge station(s)", len(stations))
+                # Only remember successes, so "try again" really does try again.
+                if stations:
+                    self._discovered[key] = stations
+
+            if key in self._discovered:
+                return await self.async_step_pick()
+            errors["base"] = "no_stations_found"
+
+        schema = vol.Schema({
+            vol.Required("devkey", default=self._devkey): str,
+            vol.Required("port", default=self._port): int,
+        })
+        return self.async_show_form(step_id="discover", data_schema=schema, errors=errors)
+
+    async def async_step_pick(self, user_input=None) -> FlowResult:
+        """Choose one of the discovered stations, then carry on with the usual settings."""
+        stations = self._discovered[(self._devkey, self._port)]
+
+        if user_input is not None:
+            self._host = user_input["host"]
+            return await self.async_step_manual()
+
+        choices = {
+            host: f"{host} ({info.get('catalogNo') or 'FCSP'}, serial {info.get('traceNo') or 'unknown'})"
+            for host, info in stations.items()
+        }
+        schema = vol.Schema({vol.Required("host", default=next(iter(choices))): vol.In(choices)})
+        return self.async_show_form(step_id="pick", data_schema=schema)
+
+    async def async_step_manual(self, user_input=None) -> FlowResult:
+        """Connection and polling settings, with anything discovery found already filled in."""
         errors = {}
 
         if user_input is not None:
             scan_interval = user_input.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
             timeout = user_input.get(CONF_API_TIMEOUT, API_TIMEOUT)
+            requests_per_minute = user_input.get(CONF_REQUESTS_PER_MINUTE, DEFAULT_REQUESTS_PER_MINUTE)
+            timeout_floor = user_input.get(CONF_TIMEOUT_FLOOR, DEFAULT_TIMEOUT_FLOOR)
+            executor_workers = user_input.get(CONF_EXECUTOR_WORKERS, DEFAULT_EXECUTOR_WORKERS)
 
             if not user_input.get("devkey"):
                 # Ideally use a translation key here, not a raw string
@@ -50,46 +141,164 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             if timeout < MIN_TIMEOUT:
                 errors[CONF_API_TIMEOUT] = "api_timeout_too_low"
 
+            if requests_per_minute < MIN_REQUESTS_PER_MINUTE:
+                errors[CONF_REQUESTS_PER_MINUTE] = "requests_per_minute_too_low"
+
+            if not MIN_TIMEOUT_FLOOR <= timeout_floor <= timeout:
+                errors[CONF_TIMEOUT_FLOOR] = "timeout_floor_out_of_range"
+
+            if not MIN_EXECUTOR_WORKERS <= executor_workers <= MAX_EXECUTOR_WORKERS:
+                errors[CONF_EXECUTOR_WORKERS] = "executor_workers_out_of_range"
+
             if not errors:
-                return self.async_create_entry(
-                    title="Local Ford Charge Station Pro",
-                    data={
-                        "host": user_input["host"],
-                        "port": user_input["port"],
-                        "devkey": user_input["devkey"],
-                        CONF_API_TIMEOUT: timeout,
-                        CONF_SCAN_INTERVAL: scan_interval,
-                        CONF_DEBUG: user_input.get(CONF_DEBUG, DEFAULT_DEBUG),
-                        CONF_TIME_FORMAT: user_input.get(CONF_TIME_FORMAT, DEFAULT_TIME_FORMAT),
-                    },
+                self._async_abort_entries_match({"host": user_input["host"]})
+                client, charger_info = await self._async_validate(
+                    user_input, timeout, timeout_floor, requests_per_minute, executor_workers
                 )
+                if charger_info is None:
+                    await client.async_close()
+                    errors["base"] = "cannot_connect"
+
+            if not errors:
+                # The serial number follows the charger around, whatever DHCP does to its IP.
+                serial = charger_info.get("traceNo")
+                if serial:
+                    await self.async_set_unique_id(serial)
+                    try:
+                        self._abort_if_unique_id_configured(
+                            updates={"host": user_input["host"], "port": user_input["port"]}
+                        )
+                    except AbortFlow:
+                        # Already configured: this session isn't going anywhere, so don't leave it open.
+                        await client.async_close()
+                        raise
+
+                data = {
+                    "host": user_input["host"],
+                    "port": user_input["port"],
+                    "devkey": user_input["devkey"],
+                    CONF_API_TIMEOUT: timeout,
+                    CONF_TIMEOUT_FLOOR: timeout_floor,
+                    CONF_SCAN_INTERVAL: scan_interval,
+                    CONF_REQUESTS_PER_MINUTE: requests_per_minute,
+                    CONF_EXECUTOR_WORKERS: executor_workers,
+                    CONF_SKIP_UNCHANGED: user_input.get(CONF_SKIP_UNCHANGED, DEFAULT_SKIP_UNCHANGED),
+                    CONF_DEBUG: user_input.get(CONF_DEBUG, DEFAULT_DEBUG),
+                    CONF_TIME_FORMAT: user_input.get(CONF_TIME_FORMAT, DEFAULT_TIME_FORMAT),
+                }
+                self._pending = (data, client, charger_info)
+                if user_input.get(CONF_CALIBRATE):
+                    return await self.async_step_calibrate()
+                return self._async_finish()
 
         # Like Vogons, Home Assistant insists forms are properly filled out.
         # This prevents crashes, even if the input is incomplete—
         # saving you from a poem about rediscovered cafeteria meatloaf.
 
         schema = vol.Schema({
-            vol.Required("host", default=DEFAULT_HOST): str,
-            vol.Required("devkey", default=DEFAULT_DEVKEY): str,
-            vol.Required("port", default=443): int,
+            vol.Required("host", default=self._host): str,
+            vol.Required("devkey", default=self._devkey): str,
+            vol.Required("port", default=self._port): int,
             vol.Required(CONF_API_TIMEOUT, default=API_TIMEOUT): int,
+            vol.Optional(CONF_TIMEOUT_FLOOR, default=DEFAULT_TIMEOUT_FLOOR): int,
             vol.Required(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): int,
+            vol.Optional(CONF_REQUESTS_PER_MINUTE, default=DEFAULT_REQUESTS_PER_MINUTE): int,
+            vol.Optional(CONF_EXECUTOR_WORKERS, default=DEFAULT_EXECUTOR_WORKERS): int,
+            vol.Optional(CONF_SKIP_UNCHANGED, default=DEFAULT_SKIP_UNCHANGED): bool,
             vol.Optional(CONF_DEBUG, default=DEFAULT_DEBUG): bool,
             vol.Optional(CONF_TIME_FORMAT, default=DEFAULT_TIME_FORMAT): vol.In(TIME_FORMAT_OPTIONS),
+            vol.Optional(CONF_CALIBRATE, default=False): bool,
         })
 
-        return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
+        return self.async_show_form(step_id="manual", data_schema=schema, errors=errors)
+
+    async def async_step_calibrate(self, user_input=None) -> FlowResult:
+        """Time the charger in the background; it can take a minute, so show progress meanwhile."""
+        if self._calibrate_task is None:
+            data, client, charger_info = self._pending
+            self._calibrate_task = self.hass.async_create_task(
+                async_calibrate(
+                    self.hass, client, charger_info.get("traceNo") or data["host"], data[CONF_REQUESTS_PER_MINUTE]
+                )
+            )
+        return _calibration_progress(self, self._calibrate_task)
+
+    async def async_step_calibrated(self, user_input=None) -> FlowResult:
+        """Offer the interval and timeout that suit the charger (yours to change)."""
+        data = self._pending[0]
+        errors = {}
+
+        if user_input is not None:
+            errors = _check_calibrated(user_input, data[CONF_TIMEOUT_FLOOR])
+            if not errors:
+                data[CONF_SCAN_INTERVAL] = user_input[CONF_SCAN_INTERVAL]
+                data[CONF_API_TIMEOUT] = user_input[CONF_API_TIMEOUT]
+                return self._async_finish()
+
+        if self._calibration is None:
+            self._calibration = _calibration_result(self._calibrate_task)
+            if self._calibration is None:
+                return self.async_abort(reason="calibration_interrupted")
+        return _show_calibration(self, self._calibration, data, errors)
+
+    def _async_finish(self) -> FlowResult:
+        data, client, charger_info = self._pending
+        self._pending = None
+        # We've done the handshake and the first fetch; setup shouldn't have to do them again.
+        async_stash_session(self.hass, data["host"], client, {"charger_info": charger_info})
+        return self.async_create_entry(title="Local Ford Charge Station Pro", data=data)
+
+    @callback
+    def async_remove(self) -> None:
+        """The flow was abandoned (closed mid-calibration, say): don't leave its session running."""
+        if self._calibrate_task is not None:
+            self._calibrate_task.cancel()
+        if self._pending is not None:
+            self.hass.async_create_task(self._pending[1].async_close())
+            self._pending = None
+
+    async def _async_validate(self, user_input, timeout, timeout_floor, requests_per_minute, workers):
+        """Connect and fetch charger info, exactly as setup would. Returns (client, charger_info or None)."""
+        host = user_input["host"]
+
+        def fcsp_factory():
+            return FCSP(host=host, devkey=user_input["devkey"], port=user_input["port"], timeout=timeout)
+
+        client = FcspClient(
+            self.hass,
+            fcsp_factory(),
+            async_get_rate_limiter(self.hass, host, requests_per_minute),
+            timeout=timeout,
+            timeout_floor=timeout_floor,
+            fcsp_factory=fcsp_factory,
+            workers=workers,
+        )
+        try:
+            await client.async_connect()
+            charger_info = await client.async_get("charger_info")
+        except Exception as err:
+            _LOGGER.warning("Could not validate FCSP at %s:%s: %s", host, user_input["port"], err)
+            return client, None
+
+        if not isinstance(charger_info, dict):
+            _LOGGER.warning("FCSP at %s answered, but not with charger info: %r", host, charger_info)
+            return client, None
+        return client, charger_info
 
 
 # And here’s where you can tweak settings later,
 # if you’re the kind of person who adjusts toaster darkness levels with a micrometer.
 
 class OptionsFlowHandler(config_entries.OptionsFlow):
-    """Handle options flow for Local FCSP."""
+    """Handle options flow for Local FCSP.
 
-    def __init__(self, config_entry):
-        """Initialize options flow."""
-        self.config_entry = config_entry
+    Home Assistant hands us self.config_entry; saved options are applied live by
+    the update listener in __init__.py, no reload required."""
+
+    def __init__(self) -> None:
+        self._options = None
+        self._calibrate_task = None
+        self._calibration = None
 
     async def async_step_init(self, user_input=None):
         """Manage the options."""
@@ -98,6 +307,9 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         if user_input is not None:
             scan_interval = user_input.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
             timeout = user_input.get(CONF_API_TIMEOUT, API_TIMEOUT)
+            requests_per_minute = user_input.get(CONF_REQUESTS_PER_MINUTE, DEFAULT_REQUESTS_PER_MINUTE)
+            timeout_floor = user_input.get(CONF_TIMEOUT_FLOOR, DEFAULT_TIMEOUT_FLOOR)
+            executor_workers = user_input.get(CONF_EXECUTOR_WORKERS, DEFAULT_EXECUTOR_WORKERS)
 
             if scan_interval < MIN_SCAN_INTERVAL:
                 errors[CONF_SCAN_INTERVAL] = "scan_interval_too_low"
@@ -105,8 +317,21 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             if timeout < MIN_TIMEOUT:
                 errors[CONF_API_TIMEOUT] = "api_timeout_too_low"
 
+            if requests_per_minute < MIN_REQUESTS_PER_MINUTE:
+                errors[CONF_REQUESTS_PER_MINUTE] = "requests_per_minute_too_low"
+
+            if not MIN_TIMEOUT_FLOOR <= timeout_floor <= timeout:
+                errors[CONF_TIMEOUT_FLOOR] = "timeout_floor_out_of_range"
+
+            if not MIN_EXECUTOR_WORKERS <= executor_workers <= MAX_EXECUTOR_WORKERS:
+                errors[CONF_EXECUTOR_WORKERS] = "executor_workers_out_of_range"
+
             if not errors:
-                return self.async_create_entry(title="", data=user_input)
+                options = {key: value for key, value in user_input.items() if key != CONF_CALIBRATE}
+                if user_input.get(CONF_CALIBRATE):
+                    self._options = options
+                    return await self.async_step_calibrate()
+                return self.async_create_entry(title="", data=options)
 
         schema = vol.Schema({
             vol.Optional(
@@ -131,6 +356,34 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     self.config_entry.data.get(CONF_API_TIMEOUT, API_TIMEOUT)
                 )
             ): int,
+            vol.Optional(
+                CONF_TIMEOUT_FLOOR,
+                default=self.config_entry.options.get(
+                    CONF_TIMEOUT_FLOOR,
+                    self.config_entry.data.get(CONF_TIMEOUT_FLOOR, DEFAULT_TIMEOUT_FLOOR)
+                )
+            ): int,
+            vol.Optional(
+                CONF_REQUESTS_PER_MINUTE,
+                default=self.config_entry.options.get(
+                    CONF_REQUESTS_PER_MINUTE,
+                    self.config_entry.data.get(CONF_REQUESTS_PER_MINUTE, DEFAULT_REQUESTS_PER_MINUTE)
+                )
+            ): int,
+            vol.Optional(
+                CONF_EXECUTOR_WORKERS,
+                default=self.config_entry.options.get(
+                    CONF_EXECUTOR_WORKERS,
+                    self.config_entry.data.get(CONF_EXECUTOR_WORKERS, DEFAULT_EXECUTOR_WORKERS)
+                )
+            ): int,
+            vol.Optional(
+                CONF_SKIP_UNCHANGED,
+                default=self.config_entry.options.get(
+                    CONF_SKIP_UNCHANGED,
+                    self.config_entry.data.get(CONF_SKIP_UNCHANGED, DEFAULT_SKIP_UNCHANGED)
+                )
+            ): bool,
             vol.Optional(
                 CONF_DEBUG,
                 default=self.config_entry.options.get(
@@ -138,6 +391,91 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     self.config_entry.data.get(CONF_DEBUG, DEFAULT_DEBUG)
                 )
             ): bool,
+            vol.Optional(CONF_CALIBRATE, default=False): bool,
         })
 
         return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
+
+    async def async_step_calibrate(self, user_input=None):
+        """Time the running station in the background, showing progress meanwhile."""
+        if self._calibrate_task is None:
+            # Through the station's own client, so it shares the running poller's session and budget.
+            coordinator = self.hass.data.get(DOMAIN, {}).get("coordinators", {}).get(self.config_entry.entry_id)
+            if coordinator is None:
+                return self.async_abort(reason="not_loaded")
+            self._calibrate_task = self.hass.async_create_task(
+                async_calibrate(
+                    self.hass,
+                    coordinator.client,
+                    self.config_entry.unique_id or self.config_entry.data.get("host"),
+                    self._options[CONF_REQUESTS_PER_MINUTE],
+                )
+            )
+        return _calibration_progress(self, self._calibrate_task)
+
+    async def async_step_calibrated(self, user_input=None):
+        """Offer the interval and timeout that suit the station."""
+        errors = {}
+
+        if user_input is not None:
+            errors = _check_calibrated(user_input, self._options[CONF_TIMEOUT_FLOOR])
+            if not errors:
+                return self.async_create_entry(title="", data={**self._options, **user_input})
+
+        if self._calibration is None:
+            self._calibration = _calibration_result(self._calibrate_task)
+            if self._calibration is None:
+                return self.async_abort(reason="calibration_interrupted")
+        return _show_calibration(self, self._calibration, self._options, errors)
+
+    @callback
+    def async_remove(self) -> None:
+        """Closed mid-calibration: stop asking the charger on its behalf."""
+        if self._calibrate_task is not None:
+            self._calibrate_task.cancel()
+
+
+def _calibration_progress(flow, task):
+    """Spinner while the calibration task runs; on to the results once it's done."""
+    if not task.done():
+        return flow.async_show_progress(step_id="calibrate", progress_action="calibrate", progress_task=task)
+    return flow.async_show_progress_done(next_step_id="calibrated")
+
+
+def _calibration_result(task):
+    """The finished calibration run, or None if it failed or was cancelled (the entry unloaded, say)."""
+    try:
+        return task.result()
+    except (Exception, asyncio.CancelledError) as err:
+        _LOGGER.warning("FCSP calibration didn't finish: %r", err)
+        return None
+
+
+def _check_calibrated(user_input, timeout_floor) -> dict:
+    """The calibrate step's two fields get the same minimums as everywhere else."""
+    errors = {}
+    if user_input[CONF_SCAN_INTERVAL] < MIN_SCAN_INTERVAL:
+        errors[CONF_SCAN_INTERVAL] = "scan_interval_too_low"
+    if user_input[CONF_API_TIMEOUT] < MIN_TIMEOUT:
+        errors[CONF_API_TIMEOUT] = "api_timeout_too_low"
+    elif user_input[CONF_API_TIMEOUT] < timeout_floor:
+        errors[CONF_API_TIMEOUT] = "timeout_floor_out_of_range"
+    return errors
+
+
+def _show_calibration(flow, run, current, errors):
+    """The calibrate form: what was measured, with the suggestion (or, failing one, what you had) filled in."""
+    suggested = run["suggested"]
+    if suggested is None and not errors:
+        errors = {"base": "calibration_failed"}
+    defaults = suggested or current
+    schema = vol.Schema({
+        vol.Required(CONF_SCAN_INTERVAL, default=defaults[CONF_SCAN_INTERVAL]): int,
+        vol.Required(CONF_API_TIMEOUT, default=defaults[CONF_API_TIMEOUT]): int,
+    })
+    return flow.async_show_form(
+        step_id="calibrated",
+        data_schema=schema,
+        errors=errors,
+        description_placeholders={"results": describe(run)},
+    )
@@ -21,10 +21,133 @@ CONF_API_TIMEOUT = "timeout"
 MIN_TIMEOUT = 30  # seconds
 MIN_SCAN_INTERVAL = 30  # seconds
 
+# === Adaptive Timeouts ===
+# Each endpoint learns its own deadline from measured round trips, between this floor and the
+# configured timeout. A dead charger is then noticed in seconds, not a minute per endpoint.
+CONF_TIMEOUT_FLOOR = "timeout_floor"
+DEFAULT_TIMEOUT_FLOOR = 5  # seconds
+MIN_TIMEOUT_FLOOR = 2  # seconds — below this, Wi-Fi hiccups start looking like outages.
+ADAPTIVE_TIMEOUT_MIN_SAMPLES = 3  # Round trips measured before we trust the estimate.
+ADAPTIVE_TIMEOUT_GRACE = 2  # seconds past the deadline before asyncio gives up on the thread.
+
+# === Worker Threads ===
+# fcsp_api blocks, so its calls run on threads — our own small pool, never Home Assistant's shared one.
+# Calls are one at a time per station, so the spare workers are there to absorb threads wedged on a
+# hung TLS read until the socket gives up. When every worker is wedged, calls fail fast instead of queueing.
+CONF_EXECUTOR_WORKERS = "executor_workers"
+DEFAULT_EXECUTOR_WORKERS = 3
+MIN_EXECUTOR_WORKERS = 1
+MAX_EXECUTOR_WORKERS = 8
+
+# === Liveness Probe ===
+# A bare TCP connect, far cheaper than a poll, so the online sensor knows within seconds.
+PROBE_INTERVAL = 10  # seconds
+PROBE_TIMEOUT = 3  # seconds
+PROBE_FAILURE_THRESHOLD = 2  # Consecutive failed knocks before we call it unreachable.
+
+# === Load Shedding ===
+# When Home Assistant itself is struggling, the charger and inverter state still get polled;
+# config/network fetches, debug JSON and Last Updated rewrites wait their turn.
+LOAD_SAMPLE_INTERVAL = 1.0  # seconds between event loop lag samples
+LOOP_LAG_THRESHOLD = 0.1  # seconds late a timer can fire before we call the loop busy
+EXECUTOR_QUEUE_THRESHOLD = 16  # jobs waiting for Home Assistant's executor before we call it busy
+LOAD_MAX_DEFERRED_POLLS = 10  # Non-critical endpoints are fetched at least this often, however busy.
+
+# === Discovery ===
+# Sweeping a /24 for an open port 443, many knocks at a time, then asking each open door for charger info.
+DISCOVERY_CONCURRENCY = 64  # Simultaneous TCP connects — enough for speed, not enough to look like a port scan storm.
+DISCOVERY_CONNECT_TIMEOUT = 1.0  # seconds — LAN hosts answer in milliseconds or not at all.
+DISCOVERY_IDENTIFY_CONCURRENCY = 4  # Simultaneous identify sessions — each one is an fcsp_api session and a worker thread.
+DISCOVERY_IDENTIFY_TIMEOUT = 5  # seconds per fcsp_api call while confirming a candidate.
+DISCOVERY_MIN_PREFIX = 24  # Never sweep more than a /24 around our own address.
+
+# === Setup Handoff ===
+# The config flow's validated session is handed to async_setup_entry, if it gets there this quickly.
+SESSION_HANDOFF_MAX_AGE = 60  # seconds
+
+# === Outage Journal ===
+# A power cut is one short JSON line, so even these limits hold decades of bad luck.
+JOURNAL_MAX_BYTES = 256 * 1024  # Rotate the live file past this size.
+JOURNAL_BACKUPS = 4  # Rotated files kept before the oldest is dropped.
+
+# === Long-Term Statistics ===
+# Hourly charging / powering-home minutes and fault counts, imported as external statistics.
+STATISTICS_STORE_VERSION = 1
+
+# === Capture & Replay ===
+# Raw responses written to local_fcsp_capture_<entry>_<time>.jsonl, for bug reports and regression fixtures.
+MAX_CAPTURE_MINUTES = 24 * 60
+CAPTURE_MAX_BYTES = 1024 * 1024  # Rotate the live capture file past this size.
+CAPTURE_BACKUPS = 5
+CAPTURE_FLUSH_LINES = 5  # One full poll: connect plus four endpoints.
+
+# Never leaves the house: diagnostics downloads and capture files both redact these.
+REDACT_KEYS = {"devkey", "passcode", "wifiAddr", "bleAddr", "traceNo", "slno"}
+
+# === Data Cache ===
+# Every changed poll used to be a disk write. Now they're coalesced, and flushed on unload.
+CACHE_SAVE_DELAY = 10  # seconds
+
+# === Request Budget ===
+# The timers above only pace the coordinator. This budget is shared by *everything* that talks to
+# a station — polls, manual refreshes, config flow probes, diagnostics — so nobody sneaks past it.
+CONF_REQUESTS_PER_MINUTE = "requests_per_minute"
+DEFAULT_REQUESTS_PER_MINUTE = 12
+MIN_REQUESTS_PER_MINUTE = 5  # One full poll: connect plus four endpoints.
+DEFAULT_REQUEST_BURST = 5  # Tokens in the bucket, so a full poll can go out back-to-back.
+RATE_LIMIT_MAX_WAIT = 30  # seconds a caller will queue before we shed the request.
+
+# === Calibration ===
+# An optional config/options flow step: time a few rounds of every endpoint (paced by the request
+# budget above, so it's no harder on the charger than polling) and suggest an interval and timeout.
+CONF_CALIBRATE = "calibrate"
+CALIBRATION_ROUNDS = 3  # Calls per endpoint.
+CALIBRATION_MAX_SECONDS = 120  # No new calls after this; a dying link shouldn't hold the form hostage.
+CALIBRATION_TIMEOUT_FACTOR = 4  # Suggested timeout: this many times the slowest answer...
+CALIBRATION_DUTY_FACTOR = 10  # ...and interval: a full poll takes no more than a tenth of it.
+CALIBRATION_ERROR_RATE = 0.1  # More failures than this and the suggested interval is doubled.
+CALIBRATION_HISTORY = 10  # Runs kept per station, to compare against next time.
+CALIBRATION_STORE_VERSION = 1
+
+# === Endpoints ===
+# Coordinator data key -> fcsp_api method. The only four we poll.
+ENDPOINTS = {
+    "charger_info": "get_charger_info",
+    "inverter_info": "get_inverter_info",
+    "config_status": "get_config_status",
+    "network_info": "get_network_info",
+}
+
+# Endpoints that are the charger itself. If these answer, it's online, even if the others are
+# having a bad day (get_network_info, mostly); if they don't, that's an offline strike.
+CRITICAL_ENDPOINTS = ("charger_info", "inverter_info")
+
+# Selective refreshes arriving this close together share one trip to the charger.
+REFRESH_COALESCE_WINDOW = 1.0  # seconds
+
+# The local_fcsp.profile service captures at most this many refresh cycles per run.
+MAX_PROFILE_CYCLES = 50
+
+# Skip cleaning, caching and entity updates when a poll is byte-for-byte the same as the last one.
+CONF_SKIP_UNCHANGED = "skip_unchanged"
+DEFAULT_SKIP_UNCHANGED = True
+
 CONF_DEBUG = "debug"
 DEFAULT_DEBUG = True
 
+# === Dispatcher Signals ===
+# Formatted with the config entry ID, so each entry only hears its own news.
+SIGNAL_OPTIONS_UPDATED = f"{DOMAIN}_options_updated_{{}}"
+# Sent with True/False when a Home Integration System appears or disappears.
+SIGNAL_HIS_CHANGED = f"{DOMAIN}_his_changed_{{}}"
+# Sent with True/False when the liveness probe decides the station came or went.
+SIGNAL_REACHABILITY = f"{DOMAIN}_reachability_{{}}"
+# Sent when a poll came back unchanged and the entity fan-out was skipped. The charger's data
+# didn't move, but sensors about the poller itself (throttling, probe latency) may have.
+SIGNAL_POLL_UNCHANGED = f"{DOMAIN}_poll_unchanged_{{}}"
+
 # === General Constants ===
+PLATFORMS = ["sensor", "binary_sensor"]
 API_TIMEOUT = 60  # seconds
 DEFAULT_SCAN_INTERVAL = 60
 
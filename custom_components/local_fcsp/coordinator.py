@@ -1,12 +1,31 @@
+import asyncio
+import hashlib
 import logging
 import json
 from datetime import timedelta
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.util import dt as hass_dt
 
+from .client import FcspClientClosedError, FcspThrottledError
+from .const import (
+    CRITICAL_ENDPOINTS,
+    ENDPOINTS,
+    LOAD_MAX_DEFERRED_POLLS,
+    REFRESH_COALESCE_WINDOW,
+    SIGNAL_HIS_CHANGED,
+    SIGNAL_POLL_UNCHANGED,
+    SIGNAL_REACHABILITY,
+)
+
 _LOGGER = logging.getLogger(__name__)
 
 
+class FcspUnreachableError(Exception):
+    """Raised instead of polling while the liveness probe says the station is gone."""
+
+
 # ---------------------------------------------------------------------------
 # Data cleaning helpers
 # ---------------------------------------------------------------------------
@@ -127,6 +146,16 @@ def dump_json(data):
         return "Error dumping JSON"
 
 
+def fingerprint(response) -> bytes:
+    """Cheap, stable fingerprint of a raw endpoint response.
+
+    fcsp_api hands us parsed JSON, and the same bytes always parse into the same
+    dicts in the same order — so repr() is as good as the bytes, and much cheaper
+    than re-serialising.
+    """
+    return hashlib.blake2b(repr(response).encode(), digest_size=16).digest()
+
+
 def format_elapsed_time(dt_obj):
     """Return a human-readable elapsed time from a datetime object."""
     if not dt_obj:
@@ -150,18 +179,52 @@ def format_elapsed_time(dt_obj):
 class FcspDataUpdateCoordinator(DataUpdateCoordinator):
     """Coordinator for FCSP data."""
 
-    def __init__(self, hass, config_entry, fcsp, cache_store, cached_data, scan_interval):
+    def __init__(self, hass, config_entry, client, cache_store, cached_data, scan_interval, skip_unchanged=True):
         super().__init__(
             hass,
             _LOGGER,
+            config_entry=config_entry,
             name="FCSP Coordinator",
             update_interval=timedelta(seconds=scan_interval),
         )
-        self._fcsp = fcsp
+        self._client = client
         self._cache_store = cache_store
+        # Every config entry showing this station, owner (the one whose options we run on) first.
+        self.entry_ids = [config_entry.entry_id] if config_entry is not None else []
+        self._closed = False
         self._last_update_dt = None
         self._fail_count = 0
         self._offline = False
+        self._pending_endpoints = set()
+        self._pending_refresh = None
+
+        # Per-endpoint freshness: when each last came back, and why the ones that didn't, didn't.
+        self._endpoint_updated = {}
+        self._stale = {}
+
+        # Short-circuit for byte-identical polls (which, on a quiet day, is nearly all of them).
+        self.skip_unchanged = skip_unchanged
+        self._fingerprints = {}
+        self._suppress_fanout = False
+        self.short_circuit_hits = 0
+        self.short_circuit_misses = 0
+
+        # Set by the local_fcsp.profile and local_fcsp.capture services while they run,
+        # and by the local_fcsp/subscribe websocket command while anyone's subscribed.
+        self.profiler = None
+        self.capture = None
+        self.stream = None
+
+        # The LivenessProbe, OutageJournal, HourlyStatistics, LoadMonitor and FetchPlanner, if setup gave us them.
+        self.probe = None
+        self.journal = None
+        self.statistics = None
+        self.load = None
+        self.planner = None
+        self._deferred_polls = 0
+
+        # Responses the config flow already fetched on a still-warm session, used once by the next fetch.
+        self._prefetched = {}
         self.data = cached_data or {}
 
         # Determine HIS attachment from cached data on startup
@@ -170,53 +233,132 @@ class FcspDataUpdateCoordinator(DataUpdateCoordinator):
             real_inverter_connected(inv) for inv in cached_inverters
         )
 
+    async def _async_fetch(self, endpoints) -> tuple[dict, dict]:
+        """Connect, then fetch the given endpoints.
+
+        Returns (raw, uncleaned responses; endpoint -> exception for the ones that failed).
+        A failed connect fails the lot and raises; a failed endpoint doesn't stop the rest.
+        """
+        prefetched, self._prefetched = self._prefetched, {}
+        if not prefetched:
+            # A handed-over session is already shaken hands with; anything else needs a hello.
+            await self._client.async_connect()
+        raw, failed = {}, {}
+        for endpoint in endpoints:
+            if endpoint in prefetched:
+                raw[endpoint] = prefetched[endpoint]
+                continue
+            try:
+                raw[endpoint] = await self._client.async_get(endpoint)
+            except Exception as e:
+                failed[endpoint] = e
+        if failed and not raw:
+            # Nothing came back at all: that's a failed poll, not a partial one.
+            raise next(iter(failed.values()))
+        return raw, failed
+
+    def _merge(self, raw: dict, failed: dict) -> dict:
+        """Clean what came back, lay it over what we had, and stamp freshness per endpoint."""
+        now = hass_dt.utcnow()
+        for endpoint in raw:
+            self._endpoint_updated[endpoint] = now
+            self._stale.pop(endpoint, None)
+        for endpoint, error in failed.items():
+            # Keep the last good value, but say it's old. Once is enough for the log.
+            if endpoint not in self._stale:
+                _LOGGER.info("FCSP %s fetch failed; keeping its last value: %s", endpoint, error)
+            self._stale[endpoint] = f"{type(error).__name__}: {error}"
+        return {**(self.data or {}), **self._clean(raw)}
+
+    def _critical_failure(self, failed: dict) -> Exception | None:
+        """The first failure that means the charger itself didn't answer, if any.
+
+        The limiter choosing not to ask isn't one, and nor is the slow network_info endpoint timing out.
+        """
+        for endpoint in CRITICAL_ENDPOINTS:
+            error = failed.get(endpoint)
+            if error is not None and not isinstance(error, FcspThrottledError):
+                return error
+        return None
+
+    def _clean(self, raw: dict) -> dict:
+        """Clean whatever endpoints were fetched, and re-check HIS attachment if we can."""
+        cleaned = dict(raw)
+        if "inverter_info" in raw:
+            inverter_info = normalize_inverter_states(raw["inverter_info"] or [])
+            inverter_info = clean_inverter_info_list(inverter_info)
+            real_inverters = [inv for inv in inverter_info if real_inverter_connected(inv)]
+            self.home_integration_attached = bool(real_inverters)
+            cleaned["inverter_info"] = real_inverters if real_inverters else None
+        return cleaned
+
     async def _async_update_data(self):
         """Fetch all endpoints, clean inverter data, cache, and return."""
-        import asyncio
-        loop = asyncio.get_running_loop()
+        self._suppress_fanout = False
+        endpoints = self._plan_endpoints()
         try:
-            await loop.run_in_executor(None, self._fcsp.connect)
-
-            charger_info  = await loop.run_in_executor(None, self._fcsp.get_charger_info)
-            config_status = await loop.run_in_executor(None, self._fcsp.get_config_status)
-            network_info  = await loop.run_in_executor(None, self._fcsp.get_network_info)
-            inverter_info = await loop.run_in_executor(None, self._fcsp.get_inverter_info)
+            if self.probe is not None and not self.probe.reachable:
+                # No point spending a full set of timeouts on a charger that won't pick up.
+                raise FcspUnreachableError("liveness probe reports station unreachable")
+
+            raw, failed = await self._async_fetch(endpoints)
+
+            # A partial poll, or the first full one after it, is news even if the bytes aren't.
+            # (Endpoints nobody polls can't be stale-then-fresh, so they don't count.)
+            if self._unchanged(raw) and not failed and not any(ep in self._stale for ep in endpoints):
+                # Same bytes as last time: skip cleaning, caching and the entity fan-out.
+                # Just note that the data is still fresh.
+                self.short_circuit_hits += 1
+                self._fail_count = 0
+                self._last_update_dt = hass_dt.utcnow()
+                self._endpoint_updated.update(dict.fromkeys(raw, self._last_update_dt))
+                self._suppress_fanout = True
+                _LOGGER.debug("FCSP data unchanged; skipping update fan-out")
+                for entry_id in self.entry_ids:
+                    async_dispatcher_send(self.hass, SIGNAL_POLL_UNCHANGED.format(entry_id))
+                return self.data
 
-            inverter_info = normalize_inverter_states(inverter_info or [])
-            inverter_info = clean_inverter_info_list(inverter_info)
-            real_inverters = [inv for inv in inverter_info if real_inverter_connected(inv)]
+            self.short_circuit_misses += 1
+            fresh_data = self._merge(raw, failed)
 
-            self.home_integration_attached = bool(real_inverters)
-            self._fail_count = 0
-            self._offline = False
+            critical = self._critical_failure(failed)
+            if critical is not None and not all(ep in fresh_data for ep in CRITICAL_ENDPOINTS):
+                # No charger state ever, so nothing to fall back on: fail like before.
+                raise critical
+            if critical is not None:
+                self._strike(critical)
+            else:
+                self._fail_count = 0
+                self._offline = False
             self._last_update_dt = hass_dt.utcnow()
 
-            fresh_data = {
-                "charger_info":  charger_info,
-                "inverter_info": real_inverters if real_inverters else None,
-                "config_status": config_status,
-                "network_info":  network_info,
-            }
-
             if self._cache_store:
                 await self._cache_store.save(fresh_data)
 
             _LOGGER.debug(
                 "FCSP data fetched (inverter_count=%s). Keys: %s",
-                len(real_inverters),
-                list(fresh_data.keys()),
+                len(fresh_data.get("inverter_info") or []),
+                list(raw.keys()),
             )
             return fresh_data
 
+        except FcspClientClosedError:
+            # We're being unloaded mid-poll. Not the charger's fault, and nobody's listening.
+            _LOGGER.debug("FCSP poll abandoned: client closed")
+            return self.data
+
+        except FcspThrottledError as e:
+            # We chose not to ask, so the charger didn't fail to answer. Not an offline strike.
+            _LOGGER.info("FCSP poll skipped: %s", e)
+            if self.data:
+                return self.data
+            raise
+
         except Exception as e:
-            self._fail_count += 1
-            if self._fail_count >= 3:
-                self._offline = True
-            _LOGGER.warning(
-                "FCSP fetch failed (%d): %s — using cached data if available",
-                self._fail_count,
-                e,
-            )
+            self._strike(e)
+            # Only what we meant to fetch: an endpoint nobody polls would never be fetched fresh again.
+            for endpoint in endpoints:
+                self._stale.setdefault(endpoint, f"{type(e).__name__}: {e}")
             if self.data:
                 cached_inverters = self.data.get("inverter_info") or []
                 self.home_integration_attached = any(
@@ -225,22 +367,228 @@ class FcspDataUpdateCoordinator(DataUpdateCoordinator):
                 return self.data
             raise
 
+    def _plan_endpoints(self) -> list:
+        """Whatever somebody reads (see FetchPlanner), less the optional ones for a while if Home Assistant is busy."""
+        planned = self.planner.endpoints if self.planner is not None else list(ENDPOINTS)
+        optional = [ep for ep in planned if ep not in CRITICAL_ENDPOINTS]
+        if optional and self._deferred_polls < LOAD_MAX_DEFERRED_POLLS and self.should_shed("endpoint_fetch"):
+            self._deferred_polls += 1
+            return [ep for ep in planned if ep in CRITICAL_ENDPOINTS]
+        self._deferred_polls = 0
+        return planned
+
+    def _strike(self, error: Exception) -> None:
+        """One more poll the charger didn't answer; three in a row and it's offline."""
+        self._fail_count += 1
+        if self._fail_count >= 3:
+            self._offline = True
+        _LOGGER.warning(
+            "FCSP fetch failed (%d): %s — using cached data if available",
+            self._fail_count,
+            error,
+        )
+
+    def _unchanged(self, raw: dict) -> bool:
+        """Record fingerprints for a fetch; True if every one matches the last poll."""
+        fingerprints = {endpoint: fingerprint(response) for endpoint, response in raw.items()}
+        unchanged = (
+            self.skip_unchanged
+            and bool(self.data)
+            # Coming back from offline is news, even if the payload isn't.
+            and not self._offline
+            # Endpoints we didn't fetch this time (see _plan_endpoints) haven't changed either.
+            and all(self._fingerprints.get(ep) == value for ep, value in fingerprints.items())
+        )
+        self._fingerprints.update(fingerprints)
+        return unchanged
+
+    # -----------------------------------------------------------------------
+    # Sharing and teardown
+    # -----------------------------------------------------------------------
+
+    @callback
+    def async_attach(self, entry) -> None:
+        """Another config entry for the same physical station: show it our data rather than poll again."""
+        if entry.entry_id not in self.entry_ids:
+            self.entry_ids.append(entry.entry_id)
+        if self.planner is not None:
+            self.planner.async_add_entry(entry)
+
+    @callback
+    def async_detach(self, entry_id: str) -> bool:
+        """An entry is unloading. Returns True if it was the last one, and it's time to shut down."""
+        if entry_id in self.entry_ids:
+            self.entry_ids.remove(entry_id)
+        if self.planner is not None:
+            self.planner.async_remove_entry(entry_id)
+        if self.entry_ids and self.config_entry is not None and self.config_entry.entry_id == entry_id:
+            # The owner's leaving, but not everyone: the next entry in line takes over.
+            self.config_entry = self.hass.config_entries.async_get_entry(self.entry_ids[0])
+        return not self.entry_ids
+
+    async def async_shutdown(self) -> None:
+        """Tear down everything this coordinator holds open, so a reload starts from nothing.
+
+        Finishes any capture, ends websocket subscriptions, cancels a pending selective refresh,
+        stops the refresh timer and the probe, load monitor, planner, statistics and journal, closes
+        the client (cancelling in-flight calls and releasing its threads) and flushes the cache.
+        Does nothing while another entry still shares this station, or if it's already been done.
+        """
+        if self.entry_ids or self._closed:
+            return
+        self._closed = True
+        if self.capture is not None:
+            # Don't lose the tail of a capture to a reload.
+            await self.capture.async_stop()
+        if self.stream is not None:
+            self.stream.async_close("unloaded")
+        pending, self._pending_refresh = self._pending_refresh, None
+        if pending is not None and not pending.done():
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, Exception):
+                pass
+        await super().async_shutdown()
+        for helper in (self.probe, self.load, self.planner):
+            if helper is not None:
+                helper.async_stop()
+        if self.statistics is not None:
+            await self.statistics.async_stop()
+        if self.journal is not None:
+            await self.journal.async_flush()
+        await self._client.async_close()
+        if self._cache_store:
+            await self._cache_store.async_flush()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify listeners, unless this refresh was short-circuited."""
+        if self._suppress_fanout:
+            self._suppress_fanout = False
+            return
+        super().async_update_listeners()
+
+    # -----------------------------------------------------------------------
+    # Selective refresh (the local_fcsp.refresh service)
+    # -----------------------------------------------------------------------
+
+    async def async_refresh_endpoints(self, endpoints) -> None:
+        """Fetch only the requested endpoints and merge them into self.data.
+
+        Requests landing within REFRESH_COALESCE_WINDOW of each other share one
+        round trip to the charger, fetching the union of what they asked for.
+        Unlike async_set_updated_data, this leaves the regular poll schedule alone,
+        so endpoints nobody asked for still get refreshed on time.
+        """
+        self._pending_endpoints.update(endpoints)
+        if self._pending_refresh is None:
+            self._pending_refresh = self.hass.async_create_task(self._async_refresh_pending())
+        # Shield it: one impatient caller shouldn't cancel everybody else's fetch.
+        await asyncio.shield(self._pending_refresh)
+
+    async def _async_refresh_pending(self) -> None:
+        await asyncio.sleep(REFRESH_COALESCE_WINDOW)
+
+        # Close the batch before fetching; anyone arriving now wants data newer than this.
+        endpoints = [ep for ep in ENDPOINTS if ep in self._pending_endpoints]
+        self._pending_endpoints.clear()
+        self._pending_refresh = None
+
+        _LOGGER.debug("FCSP selective refresh of %s", endpoints)
+        raw, failed = await self._async_fetch(endpoints)
+        # Keep the fingerprints honest, so the next full poll compares against what we now show.
+        self._fingerprints.update({ep: fingerprint(response) for ep, response in raw.items()})
+        self.data = self._merge(raw, failed)
+        self._last_update_dt = hass_dt.utcnow()
+        if self._cache_store:
+            await self._cache_store.save(self.data)
+        self.async_update_listeners()
+
     @property
     def home_integration_attached(self) -> bool:
         return self._home_integration_attached
 
     @home_integration_attached.setter
     def home_integration_attached(self, value: bool):
+        if value == self._home_integration_attached:
+            return
         self._home_integration_attached = value
+        # Tell the sensor platform of every entry showing us, so it can hot-plug just the HIS entities.
+        for entry_id in self.entry_ids:
+            async_dispatcher_send(self.hass, SIGNAL_HIS_CHANGED.format(entry_id), value)
+
+    def seed(self, payloads: dict) -> None:
+        """Hand the next fetch some raw responses fetched moments ago on a connected session."""
+        self._prefetched = dict(payloads)
+
+    def endpoint_updated(self, endpoint: str):
+        """When this endpoint last answered (UTC), or None if it hasn't since startup."""
+        return self._endpoint_updated.get(endpoint)
+
+    def forget_stale(self, endpoints) -> None:
+        """These endpoints are off the fetch plan; nothing will refresh them, so stop calling them old."""
+        for endpoint in endpoints:
+            self._stale.pop(endpoint, None)
+
+    def is_stale(self, endpoint: str) -> bool:
+        """True while we're showing an old value because the last fetch of this endpoint failed."""
+        return endpoint in self._stale
+
+    @property
+    def endpoint_stats(self) -> dict:
+        return {
+            endpoint: {
+                "updated": self._endpoint_updated[endpoint].isoformat() if endpoint in self._endpoint_updated else None,
+                "stale": self._stale.get(endpoint),
+            }
+            for endpoint in ENDPOINTS
+        }
 
     @property
     def offline(self) -> bool:
         return self._offline
 
+    @property
+    def online(self) -> bool:
+        """Polls are succeeding and, if we're probing, the station answers the door."""
+        return not self._offline and (self.probe is None or self.probe.reachable)
+
+    @callback
+    def async_set_reachable(self, reachable: bool) -> None:
+        """LivenessProbe callback: tell the online sensor now, and catch up once it's back."""
+        for entry_id in self.entry_ids:
+            async_dispatcher_send(self.hass, SIGNAL_REACHABILITY.format(entry_id), reachable)
+        if self.stream is not None:
+            # "online" just flipped between polls; websocket subscribers should hear about it too.
+            self.stream.async_push()
+        if reachable:
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def should_shed(self, work: str) -> bool:
+        """True if non-critical `work` should be skipped or put off because Home Assistant is busy."""
+        return self.load is not None and self.load.should_shed(work)
+
+    @callback
+    def async_set_busy(self, busy: bool) -> None:
+        """LoadMonitor callback: once things calm down, let the entities we held back catch up."""
+        if not busy and self.data:
+            self._suppress_fanout = False
+            self.async_update_listeners()
+
     @property
     def consecutive_failures(self) -> int:
         return self._fail_count
 
+    @property
+    def client(self):
+        return self._client
+
+    @property
+    def throttled_requests(self) -> int:
+        return self._client.limiter.throttled
+
     def get_inverter_state_raw(self) -> int:
         inv_info = (self.data or {}).get("inverter_info") or []
         if inv_info:
@@ -0,0 +1,51 @@
+# DIAGNOSTICS: Everything you'd want attached to a bug report, minus the secrets.
+# Reads what the coordinator already has. The one exception: endpoints the fetch planner has been
+# skipping (nobody reads them) are fetched once, so a bug report isn't missing half the picture.
+
+from homeassistant.components.diagnostics import async_redact_data
+
+from .calibration import CalibrationStore
+from .const import DOMAIN, REDACT_KEYS as TO_REDACT
+
+
+async def async_get_config_entry_diagnostics(hass, entry) -> dict:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN]["coordinators"][entry.entry_id]
+    if coordinator.planner is not None:
+        await coordinator.planner.async_fetch_for_diagnostics()
+    calibrations = await CalibrationStore(hass).async_load(entry.unique_id or entry.data.get("host"))
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "coordinator": {
+            "offline": coordinator.offline,
+            "consecutive_failures": coordinator.consecutive_failures,
+            "home_integration_attached": coordinator.home_integration_attached,
+            "last_update": (
+                coordinator._last_update_dt.isoformat() if coordinator._last_update_dt else None
+            ),
+        },
+        "liveness_probe": coordinator.probe.stats if coordinator.probe else None,
+        "request_budget": coordinator.client.limiter.stats,
+        "timeouts": {
+            "ceiling": coordinator.client.timeout,
+            "floor": coordinator.client.timeout_floor,
+            "endpoints": coordinator.client.latency_stats,
+        },
+        "executor": coordinator.client.executor_stats,
+        "calibration": calibrations[-1] if calibrations else None,
+        "load_shedding": coordinator.load.stats if coordinator.load else None,
+        "endpoints": coordinator.endpoint_stats,
+        "fetch_plan": coordinator.planner.stats if coordinator.planner else None,
+        "short_circuit": {
+            "enabled": coordinator.skip_unchanged,
+            "hits": coordinator.short_circuit_hits,
+            "misses": coordinator.short_circuit_misses,
+        },
+        "outage_journal": await coordinator.journal.async_stats() if coordinator.journal else None,
+        "statistics": coordinator.statistics.stats if coordinator.statistics else None,
+        "data": async_redact_data(coordinator.data or {}, TO_REDACT),
+    }
@@ -0,0 +1,140 @@
+# DISCOVERY: Because nobody remembers their charger's IP address, and the router's DHCP page is a horror show.
+# Two passes: a wide, cheap sweep for anything listening on the FCSP port across the local /24,
+# then a proper fcsp_api conversation with each open door to find out who actually answers as a charger.
+# Both passes are bounded and concurrent, so a /24 takes seconds, not the better part of an episode of Blake's 7.
+
+import asyncio
+import ipaddress
+import logging
+
+from fcsp_api import FCSP
+from homeassistant.components import network
+from homeassistant.core import HomeAssistant
+
+from .client import FcspClient, TokenBucket
+from .const import (
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DOMAIN,
+    DISCOVERY_CONCURRENCY,
+    DISCOVERY_CONNECT_TIMEOUT,
+    DISCOVERY_IDENTIFY_CONCURRENCY,
+    DISCOVERY_IDENTIFY_TIMEOUT,
+    DISCOVERY_MIN_PREFIX,
+    MIN_TIMEOUT_FLOOR,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_get_scan_hosts(hass: HomeAssistant) -> list[str]:
+    """Every host address on the enabled IPv4 adapters' subnets, capped at a /24 around us."""
+    hosts = []
+    seen = set()
+    for adapter in await network.async_get_adapters(hass):
+        if not adapter["enabled"]:
+            continue
+        for ip_info in adapter["ipv4"]:
+            address = ipaddress.IPv4Address(ip_info["address"])
+            if address.is_loopback or address.is_link_local:
+                continue
+            prefix = max(ip_info["network_prefix"], DISCOVERY_MIN_PREFIX)
+            subnet = ipaddress.ip_network(f"{address}/{prefix}", strict=False)
+            for host in subnet.hosts():
+                if host != address and host not in seen:
+                    seen.add(host)
+                    hosts.append(str(host))
+    return hosts
+
+
+async def async_find_open_hosts(
+    hosts: list[str],
+    port: int,
+    concurrency: int = DISCOVERY_CONCURRENCY,
+    timeout: float = DISCOVERY_CONNECT_TIMEOUT,
+) -> list[str]:
+    """Hosts accepting a TCP connection on `port`, in the order given."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def knock(host: str) -> bool:
+        async with semaphore:
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            except (OSError, asyncio.TimeoutError):
+                return False
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            return True
+
+    results = await asyncio.gather(*(knock(host) for host in hosts))
+    return [host for host, is_open in zip(hosts, results) if is_open]
+
+
+async def async_identify_station(
+    hass: HomeAssistant, host: str, port: int, devkey: str, fcsp_factory=FCSP
+) -> dict | None:
+    """Charger info if `host` speaks FCSP with this devkey, else None.
+
+    A station we already poll keeps its own request budget; anyone else gets a throwaway one,
+    so a sweep doesn't leave a bucket behind for every printer on the network. `fcsp_factory`
+    builds the session, and defaults to fcsp_api's."""
+    limiter = hass.data.get(DOMAIN, {}).get("rate_limiters", {}).get(host) or TokenBucket(
+        DEFAULT_REQUESTS_PER_MINUTE
+    )
+    client = FcspClient(
+        hass,
+        fcsp_factory(host=host, devkey=devkey, port=port, timeout=DISCOVERY_IDENTIFY_TIMEOUT),
+        limiter,
+        timeout=DISCOVERY_IDENTIFY_TIMEOUT,
+        timeout_floor=MIN_TIMEOUT_FLOOR,
+        workers=1,
+    )
+    try:
+        await client.async_connect()
+        info = await client.async_get("charger_info")
+    except Exception as err:  # Routers, NAS boxes and printers all fail in their own special ways.
+        _LOGGER.debug("Discovery: %s:%s is not an FCSP (%s)", host, port, err)
+        return None
+    finally:
+        await client.async_close()
+
+    # A charge station knows its own catalogue and serial numbers. A web server does not.
+    if not isinstance(info, dict) or not (info.get("catalogNo") or info.get("traceNo")):
+        _LOGGER.debug("Discovery: %s:%s answered, but not like a charger", host, port)
+        return None
+    return info
+
+
+async def async_discover_stations(
+    hass: HomeAssistant,
+    devkey: str,
+    port: int = 443,
+    hosts: list[str] | None = None,
+    identify=None,
+    concurrency: int = DISCOVERY_CONCURRENCY,
+    identify_concurrency: int = DISCOVERY_IDENTIFY_CONCURRENCY,
+) -> dict[str, dict]:
+    """Find charge stations on the LAN. Returns {host: charger_info}.
+
+    `hosts` and `identify` default to the local subnets and async_identify_station;
+    override them to point discovery at a stand-in server."""
+    if hosts is None:
+        hosts = await async_get_scan_hosts(hass)
+    if identify is None:
+        identify = async_identify_station
+
+    open_hosts = await async_find_open_hosts(hosts, port, concurrency)
+    _LOGGER.debug("Discovery: %d of %d hosts listening on port %s", len(open_hosts), len(hosts), port)
+
+    # A knock is one socket; an identify is a whole fcsp_api session with its own worker thread.
+    # The sweep can afford 64 at once, identify gets a much shorter leash.
+    semaphore = asyncio.Semaphore(identify_concurrency)
+
+    async def bounded_identify(host: str) -> dict | None:
+        async with semaphore:
+            return await identify(hass, host, port, devkey)
+
+    infos = await asyncio.gather(*(bounded_identify(host) for host in open_hosts))
+    return {host: info for host, info in zip(open_hosts, infos) if info}
@@ -0,0 +1,243 @@
+# JOURNAL: The power cut diary. The recorder forgets after ten days; this doesn't.
+# One JSON line per grid outage, per station, appended and never rewritten. When the file gets
+# big it's rotated (outages.jsonl -> .1 -> .2 ...), and the oldest one falls off the end.
+# The whole history is also kept in memory, sorted, so "every outage in 2026" is a bisect, not a file read.
+#
+# An outage that's still going is kept in a small sidecar file, so a restart mid-blackout
+# (and with an HIS, Home Assistant may well have stayed up through it) picks up where it left off.
+#
+# Files are named after the station (its serial, or its address until we know that), not the entry,
+# so entries that share a station — or replace one another — share one history.
+
+import asyncio
+import bisect
+import json
+import logging
+import os
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as hass_dt
+
+from .const import JOURNAL_BACKUPS, JOURNAL_MAX_BYTES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class OutageJournal:
+    """Append-only, size-rotated log of grid outages for one station, with an in-memory range index."""
+
+    def __init__(self, hass: HomeAssistant, station: str) -> None:
+        self._hass = hass
+        self._path, self._open_path = _journal_paths(hass, station)
+        self._write_lock = asyncio.Lock()
+        self._tasks = set()
+        # Parallel lists, oldest first. Outages never overlap, so ends are sorted too.
+        self._starts = []
+        self._ends = []
+        self._records = []
+        self._open = None  # The outage in progress, if any.
+
+    # -- Loading ------------------------------------------------------------
+
+    async def async_load(self) -> None:
+        records, open_outage = await self._hass.async_add_executor_job(self._read_all)
+        records.sort(key=lambda record: record["start_ts"])
+        for record in records:
+            self._index(record)
+        self._open = open_outage
+        _LOGGER.debug(
+            "Outage journal loaded: %d outages%s", len(records), ", one in progress" if open_outage else ""
+        )
+
+    def _read_all(self) -> tuple[list, dict | None]:
+        records = []
+        for path in rotated_paths(self._path, JOURNAL_BACKUPS):
+            try:
+                with open(path, encoding="utf-8") as handle:
+                    for line in handle:
+                        try:
+                            records.append(json.loads(line))
+                        except ValueError:
+                            # A half-written last line from a power cut of our own. How fitting.
+                            _LOGGER.warning("Skipping unreadable line in %s", path)
+            except FileNotFoundError:
+                continue
+
+        open_outage = None
+        try:
+            with open(self._open_path, encoding="utf-8") as handle:
+                open_outage = json.load(handle)
+        except FileNotFoundError:
+            pass
+        except ValueError:
+            _LOGGER.warning("Discarding unreadable in-progress outage file %s", self._open_path)
+        return records, open_outage
+
+    def _index(self, record: dict) -> None:
+        self._starts.append(record["start_ts"])
+        self._ends.append(record["end_ts"])
+        self._records.append(record)
+
+    # -- Recording ----------------------------------------------------------
+
+    @callback
+    def async_observe(self, coordinator) -> None:
+        """Coordinator listener: open, extend or close the current outage."""
+        if not coordinator.home_integration_attached or not coordinator.data:
+            return
+
+        now = hass_dt.utcnow()
+        inverter_state = coordinator.get_inverter_state_raw()
+        charger_state = (coordinator.data.get("charger_info") or {}).get("state")
+        power_cut = coordinator.is_power_cut_active()
+
+        if power_cut and self._open is None:
+            self._open = {
+                "start": now.isoformat(),
+                "start_ts": now.timestamp(),
+                "inverter_states": [[0, inverter_state]],
+                "charger_states": [[0, charger_state]],
+            }
+            _LOGGER.info("Grid outage started at %s", self._open["start"])
+            self._schedule(self._async_write_open(dict(self._open)))
+
+        elif power_cut:
+            offset = round(now.timestamp() - self._open["start_ts"])
+            changed = _append_change(self._open["inverter_states"], offset, inverter_state)
+            changed |= _append_change(self._open["charger_states"], offset, charger_state)
+            if changed:
+                self._schedule(self._async_write_open(dict(self._open)))
+
+        elif self._open is not None:
+            record = self._open
+            self._open = None
+            record["end"] = now.isoformat()
+            record["end_ts"] = now.timestamp()
+            record["duration"] = round(record["end_ts"] - record["start_ts"])
+            self._index(record)
+            _LOGGER.info("Grid outage ended after %s seconds", record["duration"])
+            self._schedule(self._async_append(record))
+
+    def _schedule(self, coro) -> None:
+        task = self._hass.async_create_background_task(coro, name="local_fcsp outage journal")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _async_write_open(self, outage: dict) -> None:
+        async with self._write_lock:
+            await self._hass.async_add_executor_job(_write_json, self._open_path, outage)
+
+    async def _async_append(self, record: dict) -> None:
+        async with self._write_lock:
+            await self._hass.async_add_executor_job(self._append, record)
+
+    def _append(self, record: dict) -> None:
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        try:
+            size = os.path.getsize(self._path)
+        except FileNotFoundError:
+            size = 0
+        if size and size + len(line) > JOURNAL_MAX_BYTES:
+            rotate_file(self._path, JOURNAL_BACKUPS)
+        with open(self._path, "a", encoding="utf-8") as handle:
+            handle.write(line)
+            handle.flush()
+            os.fsync(handle.fileno())
+        try:
+            os.remove(self._open_path)
+        except FileNotFoundError:
+            pass
+
+
+    async def async_flush(self) -> None:
+        """Wait for pending writes (used on unload)."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    # -- Queries ------------------------------------------------------------
+
+    def query(self, start: datetime | None = None, end: datetime | None = None) -> list[dict]:
+        """Outages overlapping [start, end], oldest first. Either bound may be left open."""
+        low = 0 if start is None else bisect.bisect_left(self._ends, start.timestamp())
+        high = len(self._records) if end is None else bisect.bisect_right(self._starts, end.timestamp())
+        return [_public(record) for record in self._records[low:high]]
+
+    @property
+    def current(self) -> dict | None:
+        return _public(self._open) if self._open else None
+
+    async def async_stats(self) -> dict:
+        sizes = await self._hass.async_add_executor_job(self._file_sizes)
+        return {
+            "outages": len(self._records),
+            "total_seconds": sum(record["duration"] for record in self._records),
+            "in_progress": self.current,
+            "files": sizes,
+            "latest": [_public(record) for record in self._records[-5:]],
+        }
+
+    def _file_sizes(self) -> dict:
+        sizes = {}
+        for path in rotated_paths(self._path, JOURNAL_BACKUPS):
+            try:
+                sizes[os.path.basename(path)] = os.path.getsize(path)
+            except OSError:
+                continue
+        return sizes
+
+
+async def async_remove_journal(hass: HomeAssistant, station: str) -> None:
+    """Delete a station's journal: every rotated file and any outage in progress."""
+    path, open_path = _journal_paths(hass, station)
+    await hass.async_add_executor_job(_remove_files, rotated_paths(path, JOURNAL_BACKUPS) + [open_path])
+
+
+def _journal_paths(hass: HomeAssistant, station: str) -> tuple[str, str]:
+    return (
+        hass.config.path(".storage", f"local_fcsp_outages_{station}.jsonl"),
+        hass.config.path(".storage", f"local_fcsp_outages_{station}.open.json"),
+    )
+
+
+def _remove_files(paths: list[str]) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        _LOGGER.debug("Removed %s", path)
+
+
+def rotate_file(path: str, backups: int) -> None:
+    """path.{N-1} -> path.N, ..., path -> path.1; whatever was path.N is gone."""
+    for n in range(backups, 0, -1):
+        source = path if n == 1 else f"{path}.{n - 1}"
+        if os.path.exists(source):
+            os.replace(source, f"{path}.{n}")
+    _LOGGER.debug("Rotated %s", path)
+
+
+def rotated_paths(path: str, backups: int) -> list[str]:
+    """A rotated file set, oldest first, live file last (whether or not they exist)."""
+    return [f"{path}.{n}" for n in range(backups, 0, -1)] + [path]
+
+
+def _append_change(sequence: list, offset: int, state) -> bool:
+    """Record a state only when it differs from the last one: [[seconds_since_start, state], ...]."""
+    if sequence and sequence[-1][1] == state:
+        return False
+    sequence.append([offset, state])
+    return True
+
+
+def _public(record: dict) -> dict:
+    """A record without the epoch bookkeeping."""
+    return {key: value for key, value in record.items() if not key.endswith("_ts")}
+
+
+def _write_json(path: str, data: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(data, handle, separators=(",", ":"))
@@ -0,0 +1,123 @@
+# LOAD: The bouncer with a clicker. When Home Assistant's event loop is running late or its executor
+# has a queue out the door, we stop bringing nice-to-haves to the party: the config and network
+# fetches, the debug JSON dumps, the Last Updated rewrites. Charger and inverter state always get in.
+#
+# Loop lag is how late a timer we set ourselves actually fires. Executor depth is how many jobs are
+# waiting for one of Home Assistant's worker threads. Either one over its line means "busy", and busy
+# stays busy until both are back under half their line, so we don't flap on the edge.
+
+import logging
+
+from homeassistant.core import callback
+
+from .const import (
+    EXECUTOR_QUEUE_THRESHOLD,
+    LOAD_SAMPLE_INTERVAL,
+    LOOP_LAG_THRESHOLD,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Each sample, the remembered lag halves unless the new one is bigger: spikes show at once, calm takes a few seconds.
+LAG_DECAY = 0.5
+
+
+class LoadMonitor:
+    """Watches event loop lag and executor backlog, and counts the work we skipped because of them."""
+
+    def __init__(self, hass, on_change=None) -> None:
+        self._hass = hass
+        self._on_change = on_change
+        self._handle = None
+        self._expected = None
+        self.lag = 0.0  # seconds, decaying peak
+        self.executor_queue = 0
+        self._executor_unknown = False  # said so once already
+        self.busy = False
+        self.busy_episodes = 0
+        self.peak_lag = 0.0
+        self.peak_executor_queue = 0
+        self.shed = {}  # kind of work -> times skipped or deferred
+
+    @callback
+    def async_start(self) -> None:
+        self._schedule()
+
+    @callback
+    def async_stop(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _schedule(self) -> None:
+        loop = self._hass.loop
+        self._expected = loop.time() + LOAD_SAMPLE_INTERVAL
+        self._handle = loop.call_later(LOAD_SAMPLE_INTERVAL, self._sample)
+
+    @callback
+    def _sample(self) -> None:
+        late = max(0.0, self._hass.loop.time() - self._expected)
+        self.lag = max(late, self.lag * LAG_DECAY)
+        backlog = _executor_backlog(self._hass)
+        if backlog is None:
+            if not self._executor_unknown:
+                self._executor_unknown = True
+                _LOGGER.debug("Can't see Home Assistant's executor queue; judging load on loop lag alone")
+            backlog = 0
+        self.executor_queue = backlog
+        self.peak_lag = max(self.peak_lag, late)
+        self.peak_executor_queue = max(self.peak_executor_queue, self.executor_queue)
+
+        if self.busy:
+            busy = self.lag >= LOOP_LAG_THRESHOLD / 2 or self.executor_queue >= EXECUTOR_QUEUE_THRESHOLD / 2
+        else:
+            busy = self.lag > LOOP_LAG_THRESHOLD or self.executor_queue > EXECUTOR_QUEUE_THRESHOLD
+        if busy != self.busy:
+            self.busy = busy
+            if busy:
+                self.busy_episodes += 1
+            _LOGGER.info(
+                "Home Assistant is %s (loop lag %.0f ms, executor queue %d); %s non-critical FCSP work",
+                "busy" if busy else "keeping up again",
+                self.lag * 1000,
+                self.executor_queue,
+                "shedding" if busy else "resuming",
+            )
+            if self._on_change:
+                self._on_change(busy)
+
+        self._schedule()
+
+    @callback
+    def should_shed(self, work: str) -> bool:
+        """True if `work` should be skipped or put off right now; counts it if so."""
+        if not self.busy:
+            return False
+        self.shed[work] = self.shed.get(work, 0) + 1
+        return True
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "busy": self.busy,
+            "loop_lag_ms": round(self.lag * 1000, 1),
+            "peak_loop_lag_ms": round(self.peak_lag * 1000, 1),
+            "executor_queue": self.executor_queue,
+            "peak_executor_queue": self.peak_executor_queue,
+            "busy_episodes": self.busy_episodes,
+            "shed": dict(self.shed),
+        }
+
+
+def _executor_backlog(hass) -> int | None:
+    """Jobs queued for Home Assistant's default executor (None if we can't tell).
+
+    Best effort: it's a private attribute of the loop's executor, and may not be there."""
+    executor = getattr(hass.loop, "_default_executor", None)
+    queue = getattr(executor, "_work_queue", None)
+    if queue is None:
+        return None
+    try:
+        return queue.qsize()
+    except NotImplementedError:
+        return None
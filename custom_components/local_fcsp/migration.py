@@ -0,0 +1,109 @@
+# MIGRATION: The one-time spring clean.
+# Everything in here used to run on *every* sensor setup — restarts, reloads, the lot.
+# Now it runs once per config entry, during the entry version migration, and then
+# never again. Like clearing out the garage: painful, but you only do it once.
+
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+
+from .cache import LocalFcspCache
+from .const import DOMAIN
+from .coordinator import real_inverter_connected
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Legacy entity unique IDs — removed by the version 1 -> 2 migration
+# ---------------------------------------------------------------------------
+
+# Unique ID names from pre-2026.4.0 that should be removed on upgrade.
+LEGACY_UNIQUE_ID_NAMES = [
+    "info",
+    "raw_data",
+    "fcsp_config_status",
+    "fcsp_network_info",
+    "fcsp_device_summary",
+]
+
+# Orphan devices created by pre-2026.4.0 versions.
+LEGACY_DEVICE_IDENTIFIERS = [
+    "online_device_{entry_id}",
+    "power_cut_device_{entry_id}",
+]
+
+
+def cleanup_legacy_entities(hass: HomeAssistant, entry_id: str) -> int:
+    """Remove stale entities from pre-2026.4.0 versions."""
+    entity_registry = er.async_get(hass)
+
+    # Build list of known legacy unique IDs
+    legacy_ids = []
+    for device_key in ["charge_station", "home_integration", "None"]:
+        for name in LEGACY_UNIQUE_ID_NAMES:
+            legacy_ids.append(f"local_fcsp_{device_key}_{name}_{entry_id}")
+
+    # Also catch the old binary sensor
+    legacy_ids.append(f"binary_sensor.power_cut_monitor_{entry_id}")
+
+    removed = 0
+    for unique_id in legacy_ids:
+        entity = entity_registry.async_get_entity_id("sensor", DOMAIN, unique_id)
+        if entity:
+            _LOGGER.info("Removing legacy entity '%s' for entry %s", entity, entry_id)
+            entity_registry.async_remove(entity)
+            removed += 1
+
+    if removed:
+        _LOGGER.info("Removed %d legacy entities for entry %s", removed, entry_id)
+    return removed
+
+
+def cleanup_old_power_cut_binary_sensor(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove legacy binary_sensor.power_cut_monitor_* entity if it still exists."""
+    entity_registry = er.async_get(hass)
+    old_entity_id = f"binary_sensor.power_cut_monitor_{entry_id}"
+    old_entity = entity_registry.async_get(old_entity_id)
+    if old_entity:
+        _LOGGER.info(
+            "Removing legacy Power Cut binary sensor '%s' for entry %s",
+            old_entity_id,
+            entry_id,
+        )
+        entity_registry.async_remove(old_entity.entity_id)
+
+
+def cleanup_legacy_devices(hass: HomeAssistant, entry_id: str, his_attached: bool) -> None:
+    """Remove orphan devices, plus the phantom HIS device if no inverter is attached."""
+    device_registry = dr.async_get(hass)
+
+    identifiers = [ident.format(entry_id=entry_id) for ident in LEGACY_DEVICE_IDENTIFIERS]
+    if not his_attached:
+        identifiers.append(f"home_integration_{entry_id}")
+
+    for identifier in identifiers:
+        device = device_registry.async_get_device(identifiers={(DOMAIN, identifier)})
+        if device:
+            _LOGGER.info(
+                "Removing legacy device '%s' for entry %s", identifier, entry_id,
+            )
+            device_registry.async_remove_device(device.id)
+
+
+async def async_migrate_v1_to_v2(hass: HomeAssistant, entry) -> None:
+    """Run the one-shot registry clean-up that used to live in sensor setup.
+
+    The coordinator doesn't exist yet at migration time, so HIS attachment is
+    judged from the cached data instead (frozen peas, once again, to the rescue).
+    """
+    cached = await LocalFcspCache(hass).load()
+    his_attached = any(
+        real_inverter_connected(inv) for inv in (cached.get("inverter_info") or [])
+    )
+
+    cleanup_legacy_devices(hass, entry.entry_id, his_attached)
+    cleanup_legacy_entities(hass, entry.entry_id)
+    cleanup_old_power_cut_binary_sensor(hass, entry.entry_id)
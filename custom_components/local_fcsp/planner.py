@@ -0,0 +1,177 @@
+# PLANNER: Only ask the charger for what somebody's going to read.
+# Out of the box, nothing shows config_status or network_info — their only readers are two debug
+# sensors that are off by default — yet every poll used to fetch both. The planner looks at which of
+# our entities are actually enabled (entity registry, debug option), works out which endpoints they
+# read, and the coordinator polls just those. Charger and inverter info are always on the list:
+# they're what "online" means, and half the integration reads them.
+#
+# Enable a debug sensor and its endpoint joins the plan straight away (and is fetched once, so the
+# sensor has something to show). Disable it again and the endpoint drops off.
+#
+# When several entries share one station, the plan is the union of what all of them read.
+
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import (
+    CONF_DEBUG,
+    CRITICAL_ENDPOINTS,
+    DEFAULT_DEBUG,
+    DOMAIN,
+    ENDPOINTS,
+    SIGNAL_OPTIONS_UPDATED,
+)
+from .sensor import SENSORS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FetchPlanner:
+    """Works out which endpoints a station's polls need, from the entities that read them."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, coordinator) -> None:
+        self._hass = hass
+        self._coordinator = coordinator
+        self._entries = {entry.entry_id: entry}
+        self._unsubs = []
+        self._entry_unsubs = {}
+        self.endpoints = list(ENDPOINTS)
+        self.consumers = {}
+        self.replans = 0
+        self.diagnostics_fetches = 0
+
+    @callback
+    def async_start(self) -> None:
+        self._unsubs = [
+            self._hass.bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, self._async_registry_updated),
+        ]
+        for entry_id in self._entries:
+            self._listen_for_options(entry_id)
+        self._async_replan()
+
+    @callback
+    def async_stop(self) -> None:
+        while self._unsubs:
+            self._unsubs.pop()()
+        while self._entry_unsubs:
+            self._entry_unsubs.popitem()[1]()
+
+    @callback
+    def async_add_entry(self, entry: ConfigEntry) -> None:
+        """Another entry is showing this station: its readers count too."""
+        self._entries[entry.entry_id] = entry
+        if self._unsubs:
+            self._listen_for_options(entry.entry_id)
+            self._async_replan()
+
+    @callback
+    def async_remove_entry(self, entry_id: str) -> None:
+        self._entries.pop(entry_id, None)
+        unsub = self._entry_unsubs.pop(entry_id, None)
+        if unsub is not None:
+            unsub()
+        if self._unsubs and self._entries:
+            self._async_replan()
+
+    def _listen_for_options(self, entry_id: str) -> None:
+        if entry_id not in self._entry_unsubs:
+            self._entry_unsubs[entry_id] = async_dispatcher_connect(
+                self._hass, SIGNAL_OPTIONS_UPDATED.format(entry_id), self._async_replan
+            )
+
+    @property
+    def skipped(self) -> list:
+        return [ep for ep in ENDPOINTS if ep not in self.endpoints]
+
+    @callback
+    def _async_registry_updated(self, event: Event) -> None:
+        # Creations, removals and enable/disable toggles change who's reading; renames don't.
+        if event.data.get("action") == "update" and "disabled_by" not in event.data.get("changes", {}):
+            return
+        self._async_replan()
+
+    @callback
+    def _async_replan(self) -> None:
+        consumers = {ep: ["always"] for ep in CRITICAL_ENDPOINTS}
+        for desc in self._enabled_readers():
+            readers = consumers.setdefault(desc.source_key, [])
+            if desc.key not in readers:  # Two entries showing the same sensor still read it once.
+                readers.append(desc.key)
+
+        endpoints = [ep for ep in ENDPOINTS if ep in consumers]
+        added = [ep for ep in endpoints if ep not in self.endpoints]
+        dropped = [ep for ep in self.endpoints if ep not in endpoints]
+        self.consumers = consumers
+        if endpoints == self.endpoints and self.replans:
+            return
+
+        self.replans += 1
+        self.endpoints = endpoints
+        self._coordinator.forget_stale(dropped)
+        _LOGGER.debug("FCSP fetch plan for entries %s: %s", ", ".join(self._entries), endpoints)
+        if added and self._coordinator.data:
+            # Someone just started reading this; don't make them wait a whole poll for it.
+            # Tied to the polling entry, so unloading it cancels the fetch.
+            self._coordinator.config_entry.async_create_background_task(
+                self._hass, self._async_fetch_added(added), "local_fcsp planned endpoints fetch"
+            )
+
+    def _enabled_readers(self):
+        """Descriptions whose entity, in any of our entries, is (or once created will be) enabled."""
+        registry = er.async_get(self._hass)
+        for entry in self._entries.values():
+            yield from self._entry_readers(registry, entry)
+
+    def _entry_readers(self, registry, entry: ConfigEntry):
+        debug = entry.options.get(CONF_DEBUG, entry.data.get(CONF_DEBUG, DEFAULT_DEBUG))
+        registered = {
+            reg.unique_id: reg
+            for reg in er.async_entries_for_config_entry(registry, entry.entry_id)
+            if reg.platform == DOMAIN
+        }
+        for desc in SENSORS:
+            if desc.source_key not in ENDPOINTS:
+                continue
+            if desc.debug_only and not debug:
+                continue  # Not even created.
+            reg = registered.get(f"local_fcsp_{desc.key}_{entry.entry_id}")
+            if reg is None:
+                # Not created yet: it'll start out however the description says.
+                if desc.entity_registry_enabled_default:
+                    yield desc
+            elif reg.disabled_by is None:
+                yield desc
+
+    async def _async_fetch_added(self, added: list) -> None:
+        """Fetch endpoints that just joined the plan, once, so their new readers have something to show."""
+        try:
+            await self._coordinator.async_refresh_endpoints(added)
+        except Exception as err:
+            # The next poll fetches them anyway.
+            _LOGGER.debug("FCSP fetch of newly planned %s failed: %s", added, err)
+
+    async def async_fetch_for_diagnostics(self) -> None:
+        """Fetch what the plan skips, once, so a diagnostics download has the full picture."""
+        skipped = self.skipped
+        if not skipped or not self._coordinator.online:
+            return
+        self.diagnostics_fetches += 1
+        try:
+            await self._coordinator.async_refresh_endpoints(skipped)
+        except Exception as err:
+            # A download with last known values beats no download.
+            _LOGGER.debug("FCSP diagnostics fetch of %s failed: %s", skipped, err)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "endpoints": self.endpoints,
+            "skipped": self.skipped,
+            "consumers": self.consumers,
+            "replans": self.replans,
+            "diagnostics_fetches": self.diagnostics_fetches,
+        }
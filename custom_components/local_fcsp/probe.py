@@ -0,0 +1,104 @@
+# PROBE: A knock on the charger's door every few seconds. Not a conversation, just "you in there?"
+# A bare TCP connect to the station's port — no TLS, no devkey, no endpoint — so it's cheap enough to
+# run far more often than a full poll. It tells the online sensor within seconds when the charger
+# drops off the network, and lets the coordinator skip full polls that are bound to time out.
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import (
+    PROBE_FAILURE_THRESHOLD,
+    PROBE_INTERVAL,
+    PROBE_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LivenessProbe:
+    """Periodic TCP reachability check for one station."""
+
+    def __init__(self, hass, host: str, port: int, on_change=None) -> None:
+        self._hass = hass
+        self._host = host
+        self._port = port
+        self._on_change = on_change
+        self._unsub = None
+        self._task = None
+        self.reachable = True  # Innocent until proven unplugged.
+        self.rtt_ms = None
+        self.consecutive_failures = 0
+        self.probes = 0
+        self.failures = 0
+
+    @callback
+    def async_start(self) -> None:
+        """Probe now, then every PROBE_INTERVAL seconds."""
+        self._unsub = async_track_time_interval(
+            self._hass, self._async_tick, timedelta(seconds=PROBE_INTERVAL)
+        )
+        self._async_tick()
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsub:
+            self._unsub()
+            self._unsub = None
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    @callback
+    def _async_tick(self, _now=None) -> None:
+        # Never stack probes: if the last knock is still waiting, skip this one.
+        if self._task is None or self._task.done():
+            self._task = self._hass.async_create_background_task(
+                self.async_probe(), name=f"local_fcsp probe {self._host}"
+            )
+
+    async def async_probe(self) -> bool:
+        """One TCP connect. Returns whether the station is considered reachable."""
+        self.probes += 1
+        started = time.monotonic()
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port), PROBE_TIMEOUT
+            )
+        except (OSError, asyncio.TimeoutError) as err:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.rtt_ms = None
+            _LOGGER.debug("FCSP probe to %s:%s failed: %s", self._host, self._port, err)
+        else:
+            self.rtt_ms = round((time.monotonic() - started) * 1000, 1)
+            self.consecutive_failures = 0
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+        # One dropped knock is Wi-Fi being Wi-Fi. A couple in a row is the charger being gone.
+        reachable = self.consecutive_failures < PROBE_FAILURE_THRESHOLD
+        if reachable != self.reachable:
+            self.reachable = reachable
+            _LOGGER.info(
+                "FCSP at %s is %s", self._host, "reachable again" if reachable else "unreachable"
+            )
+            if self._on_change:
+                self._on_change(reachable)
+        return reachable
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "reachable": self.reachable,
+            "rtt_ms": self.rtt_ms,
+            "probes": self.probes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+        }
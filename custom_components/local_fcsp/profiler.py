@@ -0,0 +1,237 @@
+# PROFILER: The stopwatch-and-clipboard person who follows the poll around for a few laps.
+# Nothing in here is touched until someone calls local_fcsp.profile. While a profile runs, the
+# coordinator's methods are wrapped on the *instance*; when it finishes, the wrappers are deleted
+# and the class methods shine through again. So when nobody's profiling, there's no overhead at all.
+
+import cProfile
+import inspect
+import io
+import logging
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+from homeassistant.util import dt as hass_dt
+
+_LOGGER = logging.getLogger(__name__)
+
+# Coordinator phases to time: attribute name -> span label.
+_COORDINATOR_PHASES = {
+    "_async_update_data": "update_data",
+    "_async_fetch": "fetch",
+    "_unchanged": "fingerprint",
+    "_clean": "clean",
+}
+
+_REPORT_TOP_FUNCTIONS = 40
+
+
+class PollProfiler:
+    """Instruments the next N refresh cycles of one coordinator, then writes a report."""
+
+    def __init__(self, hass, coordinator, entry_id: str, cycles: int) -> None:
+        self._hass = hass
+        self._coordinator = coordinator
+        self._entry_id = entry_id
+        self._cycles = cycles
+        self._completed = 0
+        self._loop_profile = cProfile.Profile()
+        # Executor threads get their own profiles; cProfile only ever sees its own thread.
+        self._thread_profiles = []
+        self._thread_lock = threading.Lock()
+        self._spans = []  # One {label: [seconds, ...]} per cycle.
+        self._patched = []  # (object, attribute) pairs to delete on detach.
+
+    # -----------------------------------------------------------------------
+    # Attach / detach
+    # -----------------------------------------------------------------------
+
+    def attach(self) -> None:
+        """Wrap the coordinator, its client and its cache for the duration of the profile."""
+        coordinator = self._coordinator
+        for name, label in _COORDINATOR_PHASES.items():
+            self._wrap(coordinator, name, label)
+        self._wrap(coordinator, "async_update_listeners", "entity_fanout")
+        self._wrap_refresh(coordinator)
+
+        client = coordinator.client
+        self._wrap(client.limiter, "acquire", "rate_limit_wait")
+        self._wrap(client, "async_connect", "endpoint:connect")
+        self._wrap_get(client)
+        self._wrap_executor(client)
+
+        if coordinator._cache_store:
+            self._wrap(coordinator._cache_store, "save", "cache_save")
+
+        _LOGGER.info(
+            "Profiling the next %d FCSP refresh cycle(s) for entry %s", self._cycles, self._entry_id
+        )
+
+    def detach(self) -> None:
+        """Remove every instance-level wrapper, restoring the original methods."""
+        for obj, name in self._patched:
+            try:
+                delattr(obj, name)
+            except AttributeError:
+                pass
+        self._patched.clear()
+
+    # -----------------------------------------------------------------------
+    # Wrappers
+    # -----------------------------------------------------------------------
+
+    def _record(self, label: str, seconds: float) -> None:
+        if self._spans:
+            self._spans[-1].setdefault(label, []).append(seconds)
+
+    @contextmanager
+    def _span(self, label: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(label, time.perf_counter() - start)
+
+    def _patch(self, obj, name: str, wrapper) -> None:
+        setattr(obj, name, wrapper)
+        self._patched.append((obj, name))
+
+    def _wrap(self, obj, name: str, label: str) -> None:
+        original = getattr(obj, name)
+        if inspect.iscoroutinefunction(original):
+            async def wrapper(*args, **kwargs):
+                with self._span(label):
+                    return await original(*args, **kwargs)
+        else:
+            def wrapper(*args, **kwargs):
+                with self._span(label):
+                    return original(*args, **kwargs)
+        self._patch(obj, name, wrapper)
+
+    def _wrap_get(self, client) -> None:
+        original = client.async_get
+
+        async def wrapper(endpoint):
+            with self._span(f"endpoint:{endpoint}"):
+                return await original(endpoint)
+        self._patch(client, "async_get", wrapper)
+
+    def _wrap_executor(self, client) -> None:
+        """Split each blocking call into time-queued-for-a-thread and time-in-fcsp_api."""
+        original = client._async_run
+
+        async def wrapper(name, func, *args):
+            submitted = time.perf_counter()
+
+            def timed_call():
+                started = time.perf_counter()
+                profile = _try_enable(cProfile.Profile())
+                try:
+                    return func(*args)
+                finally:
+                    finished = time.perf_counter()
+                    if profile:
+                        profile.disable()
+                    with self._thread_lock:
+                        if profile:
+                            self._thread_profiles.append(profile)
+                        self._record("executor_wait", started - submitted)
+                        self._record("fcsp_api_call", finished - started)
+
+            return await original(name, timed_call)
+        self._patch(client, "_async_run", wrapper)
+
+    def _wrap_refresh(self, coordinator) -> None:
+        """Each refresh is one cycle: profile the loop thread for its whole duration."""
+        original = coordinator._async_refresh
+
+        async def wrapper(*args, **kwargs):
+            self._spans.append({})
+            profile = _try_enable(self._loop_profile)
+            try:
+                with self._span("cycle_total"):
+                    return await original(*args, **kwargs)
+            finally:
+                if profile:
+                    profile.disable()
+                self._completed += 1
+                if self._completed >= self._cycles:
+                    self.detach()
+                    self._hass.async_create_task(self._async_write_report())
+        self._patch(coordinator, "_async_refresh", wrapper)
+
+    # -----------------------------------------------------------------------
+    # Report
+    # -----------------------------------------------------------------------
+
+    async def _async_write_report(self) -> None:
+        stamp = hass_dt.now().strftime("%Y%m%d-%H%M%S")
+        path = self._hass.config.path(f"local_fcsp_profile_{self._entry_id}_{stamp}.txt")
+        report = self.render()
+        await self._hass.async_add_executor_job(_write_text, path, report)
+        self._coordinator.profiler = None
+        _LOGGER.info("FCSP profile for entry %s written to %s", self._entry_id, path)
+
+    def render(self) -> str:
+        out = io.StringIO()
+        out.write(f"Local FCSP poll profile — entry {self._entry_id}\n")
+        out.write(f"Cycles captured: {self._completed}\n")
+        out.write(
+            "Note: the loop-thread profile includes anything else Home Assistant ran "
+            "while the poll was awaiting.\n\n"
+        )
+
+        out.write("== Wall-clock spans (ms) ==\n")
+        out.write(f"{'span':<28}{'count':>7}{'total':>12}{'mean':>10}{'max':>10}\n")
+        totals = {}
+        for cycle in self._spans:
+            for label, values in cycle.items():
+                totals.setdefault(label, []).extend(values)
+        for label in sorted(totals):
+            values = totals[label]
+            out.write(
+                f"{label:<28}{len(values):>7}{sum(values) * 1000:>12.2f}"
+                f"{sum(values) / len(values) * 1000:>10.2f}{max(values) * 1000:>10.2f}\n"
+            )
+
+        for index, cycle in enumerate(self._spans, start=1):
+            out.write(f"\n-- Cycle {index} --\n")
+            for label in sorted(cycle):
+                values = ", ".join(f"{v * 1000:.2f}" for v in cycle[label])
+                out.write(f"  {label:<26}{values}\n")
+
+        out.write("\n== Event loop thread (cProfile, by cumulative time) ==\n")
+        pstats.Stats(self._loop_profile, stream=out).sort_stats("cumulative").print_stats(
+            _REPORT_TOP_FUNCTIONS
+        )
+
+        with self._thread_lock:
+            thread_profiles = list(self._thread_profiles)
+        if thread_profiles:
+            out.write("\n== Executor threads: fcsp_api calls (cProfile, by cumulative time) ==\n")
+            stats = pstats.Stats(thread_profiles[0], stream=out)
+            for profile in thread_profiles[1:]:
+                stats.add(profile)
+            stats.sort_stats("cumulative").print_stats(_REPORT_TOP_FUNCTIONS)
+
+        return out.getvalue()
+
+
+def _try_enable(profile):
+    """Enable a cProfile.Profile, or return None if another profiler already holds the hook.
+
+    From Python 3.12 only one profiler can be active at a time (and it sees every thread),
+    so executor calls made mid-cycle are picked up by the loop profile instead. The spans
+    still get recorded either way.
+    """
+    try:
+        profile.enable()
+    except ValueError:
+        return None
+    return profile
+
+
+def _write_text(path: str, text: str) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(text)
@@ -13,18 +13,23 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     EntityCategory,
     UnitOfElectricCurrent,
+    UnitOfTime,
 )
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers import device_registry as dr
-from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import dt as hass_dt
 
 from .const import (
+    CONF_DEBUG,
     CONF_TIME_FORMAT,
+    DEFAULT_DEBUG,
     DEFAULT_TIME_FORMAT,
     DOMAIN,
+    SIGNAL_HIS_CHANGED,
+    SIGNAL_OPTIONS_UPDATED,
+    SIGNAL_POLL_UNCHANGED,
     TIME_FORMAT_12H,
     TIME_FORMAT_24H,
 )
@@ -74,6 +79,8 @@ class FcspSensorEntityDescription(SensorEntityDescription):
     source_key: str = None
     device_key: str = None
     debug_only: bool = False
+    # Reads integration housekeeping straight off the coordinator instead of endpoint data.
+    stats_fn: Callable = None
 
 
 # ---------------------------------------------------------------------------
@@ -248,6 +255,28 @@ SENSORS: list[FcspSensorEntityDescription] = [
         source_key="charger_info",
         device_key="charge_station",
     ),
+    FcspSensorEntityDescription(
+        key="charge_station_throttled_requests",
+        name="Throttled Requests",
+        icon="mdi:speedometer-slow",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        stats_fn=lambda coordinator: coordinator.throttled_requests,
+        device_key="charge_station",
+    ),
+    FcspSensorEntityDescription(
+        key="charge_station_probe_latency",
+        name="Probe Latency",
+        icon="mdi:lan-pending",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        stats_fn=lambda coordinator: coordinator.probe.rtt_ms if coordinator.probe else None,
+        device_key="charge_station",
+    ),
     FcspSensorEntityDescription(
         key="charge_station_last_updated",
         name="Last Updated",
@@ -365,52 +394,6 @@ SENSORS: list[FcspSensorEntityDescription] = [
 ]
 
 
-# ---------------------------------------------------------------------------
-# Legacy entity unique IDs — cleaned up on setup
-# ---------------------------------------------------------------------------
-
-# Unique ID patterns from pre-2026.4.0 that should be removed on upgrade.
-LEGACY_UNIQUE_IDS = [
-    "local_fcsp_{device_key}_info_{entry_id}",
-    "local_fcsp_{device_key}_raw_data_{entry_id}",
-    "local_fcsp_{device_key}_status_{entry_id}",
-    "local_fcsp_{device_key}_last_updated_{entry_id}",
-]
-
-LEGACY_UNIQUE_ID_NAMES = [
-    "info",
-    "raw_data",
-    "fcsp_config_status",
-    "fcsp_network_info",
-    "fcsp_device_summary",
-]
-
-
-async def cleanup_legacy_entities(hass: HomeAssistant, entry_id: str):
-    """Remove stale entities from pre-2026.4.0 versions."""
-    entity_registry = er.async_get(hass)
-
-    # Build list of known legacy unique IDs
-    legacy_ids = []
-    for device_key in ["charge_station", "home_integration", "None"]:
-        for name in LEGACY_UNIQUE_ID_NAMES:
-            legacy_ids.append(f"local_fcsp_{device_key}_{name}_{entry_id}")
-
-    # Also catch the old binary sensor
-    legacy_ids.append(f"binary_sensor.power_cut_monitor_{entry_id}")
-
-    removed = 0
-    for unique_id in legacy_ids:
-        entity = entity_registry.async_get_entity_id("sensor", DOMAIN, unique_id)
-        if entity:
-            _LOGGER.info("Removing legacy entity '%s' for entry %s", entity, entry_id)
-            entity_registry.async_remove(entity)
-            removed += 1
-
-    if removed:
-        _LOGGER.info("Removed %d legacy entities for entry %s", removed, entry_id)
-
-
 # ---------------------------------------------------------------------------
 # LocalFCSPSensor
 # ---------------------------------------------------------------------------
@@ -478,7 +461,10 @@ class LocalFCSPSensor(CoordinatorEntity, SensorEntity):
         desc = self.entity_description
 
         if desc.key.endswith("_last_updated"):
-            last_update_dt = self.coordinator._last_update_dt
+            last_update_dt = (
+                self.coordinator.endpoint_updated(desc.source_key)
+                or self.coordinator._last_update_dt
+            )
             if last_update_dt is None:
                 return "Unknown"
             local_dt = hass_dt.as_local(last_update_dt)
@@ -491,6 +477,9 @@ class LocalFCSPSensor(CoordinatorEntity, SensorEntity):
             fmt_str = TIME_FORMAT_24H if fmt_pref == "24h" else TIME_FORMAT_12H
             return local_dt.strftime(fmt_str)
 
+        if desc.stats_fn is not None:
+            return desc.stats_fn(self.coordinator)
+
         if desc.value_fn is None:
             return None
 
@@ -507,6 +496,20 @@ class LocalFCSPSensor(CoordinatorEntity, SensorEntity):
             )
             return None
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # Dumping and writing a page of JSON is the first thing to go when Home Assistant is busy.
+        if self.entity_description.debug_only and self.coordinator.should_shed("debug_sensor_update"):
+            return
+        super()._handle_coordinator_update()
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        """Flag values held over from an earlier poll because their endpoint just failed."""
+        if self.coordinator.is_stale(self.entity_description.source_key):
+            return {"stale": True}
+        return None
+
     @property
     def available(self):
         if self.entity_description.device_key == "home_integration":
@@ -546,6 +549,19 @@ class LocalFCSPSensor(CoordinatorEntity, SensorEntity):
         await super().async_added_to_hass()
         if self.entity_description.key.endswith("_last_updated"):
             self._refresh_task = self.hass.loop.create_task(self._refresh_loop())
+        if self.entity_description.stats_fn is not None:
+            # Counters about the poller keep moving when the charger's data doesn't.
+            self.async_on_remove(
+                async_dispatcher_connect(
+                    self.hass,
+                    SIGNAL_POLL_UNCHANGED.format(self._entry_id),
+                    self._handle_poll_unchanged,
+                )
+            )
+
+    @callback
+    def _handle_poll_unchanged(self) -> None:
+        self.async_write_ha_state()
 
     async def async_will_remove_from_hass(self):
         if self._refresh_task:
@@ -560,7 +576,9 @@ class LocalFCSPSensor(CoordinatorEntity, SensorEntity):
         try:
             while True:
                 await asyncio.sleep(60)
-                self.async_write_ha_state()
+                # "3 minutes ago" can wait a minute while Home Assistant is busy.
+                if not self.coordinator.should_shed("last_updated_rewrite"):
+                    self.async_write_ha_state()
         except asyncio.CancelledError:
             pass
 
@@ -613,89 +631,97 @@ class PowerCutSensor(CoordinatorEntity, SensorEntity):
         self.async_write_ha_state()
 
 
-# ---------------------------------------------------------------------------
-# Legacy binary sensor cleanup
-# ---------------------------------------------------------------------------
-
-async def cleanup_old_power_cut_binary_sensor(hass: HomeAssistant, entry_id: str):
-    """Remove legacy binary_sensor.power_cut_monitor_* entity if it still exists."""
-    entity_registry = er.async_get(hass)
-    old_entity_id = f"binary_sensor.power_cut_monitor_{entry_id}"
-    old_entity = entity_registry.async_get(old_entity_id)
-    if old_entity:
-        _LOGGER.info(
-            "Removing legacy Power Cut binary sensor '%s' for entry %s",
-            old_entity_id,
-            entry_id,
-        )
-        entity_registry.async_remove(old_entity.entity_id)
-
-
 # ---------------------------------------------------------------------------
 # Setup
 # ---------------------------------------------------------------------------
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
-    coordinator: FcspDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    debug = entry.options.get("debug", True)
-
-    # Remove orphan and phantom devices from older versions
-    cleaned_set = hass.data[DOMAIN].setdefault("cleanup_done", set())
-    if entry.entry_id not in cleaned_set:
-        device_registry = dr.async_get(hass)
-
-        # Legacy orphan devices created by pre-2026.4.0 versions
-        for identifier in [
-            f"online_device_{entry.entry_id}",
-            f"power_cut_device_{entry.entry_id}",
-        ]:
-            device = device_registry.async_get_device(
-                identifiers={(DOMAIN, identifier)}
-            )
-            if device:
-                _LOGGER.info(
-                    "Removing legacy orphan device '%s' for entry %s",
-                    identifier, entry.entry_id,
-                )
-                device_registry.async_remove_device(device.id)
-
-        # Remove phantom HIS device if no inverter is attached
-        if not coordinator.home_integration_attached:
-            device = device_registry.async_get_device(
-                identifiers={(DOMAIN, f"home_integration_{entry.entry_id}")}
-            )
-            if device:
-                _LOGGER.warning(
-                    "Removing phantom HIS device for entry %s", entry.entry_id
-                )
-                device_registry.async_remove_device(device.id)
-
-        cleaned_set.add(entry.entry_id)
+def _debug_enabled(entry: ConfigEntry) -> bool:
+    return entry.options.get(CONF_DEBUG, entry.data.get(CONF_DEBUG, DEFAULT_DEBUG))
 
-    # Clean up legacy entities from pre-2026.4.0
-    await cleanup_legacy_entities(hass, entry.entry_id)
-    await cleanup_old_power_cut_binary_sensor(hass, entry.entry_id)
 
-    entities = []
-    for desc in SENSORS:
-        if desc.debug_only and not debug:
-            continue
-        if desc.device_key == "home_integration" and not coordinator.home_integration_attached:
-            continue
-        entities.append(
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
+    coordinator: FcspDataUpdateCoordinator = hass.data[DOMAIN]["coordinators"][entry.entry_id]
+
+    # Entities live in four groups, keyed (debug_only, home_integration), so the debug option
+    # and the HIS coming or going can each add or remove just their own entities.
+    groups: dict[tuple[bool, bool], list] = {
+        (debug_only, his): []
+        for debug_only in (False, True)
+        for his in (False, True)
+    }
+
+    def build_group(debug_only: bool, his: bool) -> list:
+        group = [
             LocalFCSPSensor(
                 description=desc,
                 coordinator=coordinator,
                 entry_id=entry.entry_id,
                 hass=hass,
             )
+            for desc in SENSORS
+            if desc.debug_only == debug_only
+            and (desc.device_key == "home_integration") == his
+        ]
+        if his and not debug_only:
+            _LOGGER.debug("Creating PowerCutSensor for entry %s", entry.entry_id)
+            group.append(PowerCutSensor(coordinator, entry.entry_id, hass))
+        return group
+
+    @callback
+    def _async_sync_groups() -> None:
+        """Add the groups that should exist and don't, remove the ones that shouldn't and do."""
+        debug = _debug_enabled(entry)
+        his = coordinator.home_integration_attached
+        for (debug_only, his_group), group in groups.items():
+            wanted = (debug or not debug_only) and (his or not his_group)
+            if wanted and not group:
+                group.extend(build_group(debug_only, his_group))
+                # No update_before_add: setup already kicked off a refresh, and asking again
+                # just spends the station's request budget on a duplicate poll.
+                async_add_entities(group)
+            elif not wanted and group:
+                _LOGGER.debug(
+                    "Removing %d %s sensors for entry %s",
+                    len(group),
+                    "HIS" if his_group else "debug",
+                    entry.entry_id,
+                )
+                for entity in group:
+                    hass.async_create_task(entity.async_remove())
+                group.clear()
+
+    @callback
+    def _async_options_updated() -> None:
+        """Sync the debug sensors, and rewrite timestamps in the (maybe new) time format."""
+        _async_sync_groups()
+        for group in groups.values():
+            for entity in group:
+                if (
+                    isinstance(entity, LocalFCSPSensor)
+                    and entity.entity_description.key.endswith("_last_updated")
+                    and entity.hass
+                ):
+                    entity.async_write_ha_state()
+
+    @callback
+    def _async_his_changed(attached: bool) -> None:
+        _LOGGER.info(
+            "Home Integration System %s for entry %s; %s its sensors",
+            "attached" if attached else "detached",
+            entry.entry_id,
+            "adding" if attached else "removing",
         )
+        _async_sync_groups()
 
-    async_add_entities(entities, True)
+    _async_sync_groups()
 
-    if coordinator.home_integration_attached:
-        _LOGGER.debug("Creating PowerCutSensor for entry %s", entry.entry_id)
-        async_add_entities(
-            [PowerCutSensor(coordinator, entry.entry_id, hass)],
-            update_before_add=True,
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_OPTIONS_UPDATED.format(entry.entry_id), _async_options_updated
+        )
+    )
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_HIS_CHANGED.format(entry.entry_id), _async_his_changed
         )
+    )
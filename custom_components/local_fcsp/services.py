@@ -0,0 +1,176 @@
+# SERVICES: The "ring the doorbell" buttons for automations.
+# Registered once per HA run from async_setup, and shared by every config entry.
+
+import asyncio
+import logging
+from datetime import timedelta
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .capture import CaptureRecorder
+from .const import DOMAIN, ENDPOINTS, MAX_CAPTURE_MINUTES, MAX_PROFILE_CYCLES
+from .profiler import PollProfiler
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_REFRESH = "refresh"
+SERVICE_PROFILE = "profile"
+SERVICE_OUTAGES = "outages"
+SERVICE_CAPTURE = "capture"
+
+ATTR_ENDPOINTS = "endpoints"
+ATTR_ENTRY_ID = "entry_id"
+ATTR_CYCLES = "cycles"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_DURATION = "duration"
+
+REFRESH_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_ENDPOINTS): vol.All(cv.ensure_list, [vol.In(list(ENDPOINTS))]),
+    vol.Optional(ATTR_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+})
+
+PROFILE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_CYCLES, default=3): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=MAX_PROFILE_CYCLES)
+    ),
+})
+
+OUTAGES_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_START): cv.datetime,
+    vol.Optional(ATTR_END): cv.datetime,
+})
+
+CAPTURE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_DURATION, default=60): vol.All(
+        vol.Coerce(int), vol.Range(min=0, max=MAX_CAPTURE_MINUTES)
+    ),
+})
+
+
+def _loaded_coordinators(hass: HomeAssistant) -> dict:
+    """entry_id -> coordinator for every loaded entry."""
+    return hass.data.get(DOMAIN, {}).get("coordinators", {})
+
+
+def _get_coordinators(hass: HomeAssistant, call: ServiceCall) -> dict:
+    """Resolve the targeted config entries to their coordinators (every loaded one by default).
+
+    Only entries named explicitly have to be loaded; a disabled or not-ready one is just left out
+    of "all of them". Entries sharing a station share a coordinator; it's only listed once, under
+    the first of them.
+    """
+    coordinators = _loaded_coordinators(hass)
+    entry_ids = call.data.get(ATTR_ENTRY_ID) or [
+        entry.entry_id
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.entry_id in coordinators
+    ]
+
+    targets = {}
+    for entry_id in entry_ids:
+        coordinator = coordinators.get(entry_id)
+        if coordinator is None:
+            raise ServiceValidationError(f"No loaded Local FCSP entry with id '{entry_id}'")
+        if coordinator not in targets.values():
+            targets[entry_id] = coordinator
+    return targets
+
+
+async def _async_handle_refresh(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Fetch only the requested endpoints from the targeted stations."""
+    endpoints = call.data.get(ATTR_ENDPOINTS) or list(ENDPOINTS)
+    coordinators = _get_coordinators(hass, call).values()
+
+    results = await asyncio.gather(
+        *(coordinator.async_refresh_endpoints(endpoints) for coordinator in coordinators),
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        raise HomeAssistantError(f"FCSP refresh failed: {errors[0]}") from errors[0]
+
+
+async def _async_handle_profile(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Profile the next N refresh cycles of one entry; the report lands in the config dir."""
+    entry_id = call.data[ATTR_ENTRY_ID]
+    coordinator = _loaded_coordinators(hass).get(entry_id)
+    if coordinator is None:
+        raise ServiceValidationError(f"No loaded Local FCSP entry with id '{entry_id}'")
+    if coordinator.profiler is not None:
+        raise ServiceValidationError(f"A profile is already running for entry '{entry_id}'")
+
+    coordinator.profiler = PollProfiler(hass, coordinator, entry_id, call.data[ATTR_CYCLES])
+    coordinator.profiler.attach()
+
+
+async def _async_handle_capture(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Record raw FCSP traffic for a while. A duration of 0 stops a running capture early."""
+    entry_id = call.data[ATTR_ENTRY_ID]
+    coordinator = _loaded_coordinators(hass).get(entry_id)
+    if coordinator is None:
+        raise ServiceValidationError(f"No loaded Local FCSP entry with id '{entry_id}'")
+
+    minutes = call.data[ATTR_DURATION]
+    if minutes == 0:
+        if coordinator.capture is None:
+            raise ServiceValidationError(f"No capture is running for entry '{entry_id}'")
+        await coordinator.capture.async_stop()
+        return
+    if coordinator.capture is not None:
+        raise ServiceValidationError(f"A capture is already running for entry '{entry_id}'")
+
+    coordinator.capture = CaptureRecorder(hass, coordinator, entry_id, timedelta(minutes=minutes))
+    coordinator.capture.start()
+
+
+async def _async_handle_outages(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Outages from the journal, per entry, optionally limited to a time range."""
+    start = call.data.get(ATTR_START)
+    end = call.data.get(ATTR_END)
+    # Naive datetimes from a UI picker mean local time, like everywhere else in Home Assistant.
+    start = dt_util.as_local(start) if start and start.tzinfo is None else start
+    end = dt_util.as_local(end) if end and end.tzinfo is None else end
+
+    response = {}
+    for entry_id, coordinator in _get_coordinators(hass, call).items():
+        journal = coordinator.journal
+        response[entry_id] = {
+            "outages": journal.query(start, end) if journal else [],
+            "in_progress": journal.current if journal else None,
+        }
+    return response
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+
+    async def handle_refresh(call: ServiceCall) -> None:
+        await _async_handle_refresh(hass, call)
+
+    async def handle_profile(call: ServiceCall) -> None:
+        await _async_handle_profile(hass, call)
+
+    async def handle_capture(call: ServiceCall) -> None:
+        await _async_handle_capture(hass, call)
+
+    async def handle_outages(call: ServiceCall) -> ServiceResponse:
+        return await _async_handle_outages(hass, call)
+
+    hass.services.async_register(DOMAIN, SERVICE_REFRESH, handle_refresh, schema=REFRESH_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_PROFILE, handle_profile, schema=PROFILE_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_CAPTURE, handle_capture, schema=CAPTURE_SCHEMA)
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_OUTAGES,
+        handle_outages,
+        schema=OUTAGES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
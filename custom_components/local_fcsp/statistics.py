@@ -0,0 +1,201 @@
+# STATISTICS: The hourly ledger. How long did the car charge, how long did the truck keep the lights on,
+# and how many times did the charger throw a wobbly? We already know all of that from the polls, so we
+# add it up ourselves and hand the recorder finished hourly rows, instead of making it chew through
+# state history to work it out again.
+#
+# Time is credited to whatever state the last poll saw, up to the next poll (or the top of the hour).
+# Hours not yet imported — the one in progress, or one that ended while Home Assistant was down — are
+# kept in a Store, so they're imported (backfilled) on the next hour boundary rather than lost.
+#
+# The Store and the statistic IDs are named after the station, like the outage journal, so a series
+# carries on (sum and all) whichever entry happens to be polling the charger.
+
+import logging
+from datetime import datetime, timedelta
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticMeanType
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_utc_time_change
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as hass_dt
+from homeassistant.util.unit_conversion import DurationConverter
+
+from .const import DOMAIN, STATISTICS_STORE_VERSION
+from .coordinator import interpret_charger_status
+
+_LOGGER = logging.getLogger(__name__)
+
+# key -> (display name, unit, unit class)
+STATISTICS = {
+    "charging_minutes": ("Charging time", "min", DurationConverter.UNIT_CLASS),
+    "powering_home_minutes": ("Powering home time", "min", DurationConverter.UNIT_CLASS),
+    "charger_faults": ("Charger faults", None, None),
+}
+
+
+def _hour_start(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class HourlyStatistics:
+    """Per-station hourly aggregates, pushed to the recorder as external statistics."""
+
+    def __init__(self, hass: HomeAssistant, station: str, title: str) -> None:
+        self._hass = hass
+        self._title = title
+        self._store = _store(hass, station)
+        # Statistic IDs are lowercase-only; station IDs already are.
+        self._ids = {key: f"{DOMAIN}:{key}_{station}" for key in STATISTICS}
+        self._buckets = {}  # hour start (ISO) -> {key: value}
+        self._sums = {key: 0.0 for key in STATISTICS}
+        self._last_imported = None  # hour start (datetime) of the newest imported row
+        self._status = None  # last charger status we saw, None when offline / unknown
+        self._since = None  # when we saw it
+        self._unsub_timer = None
+        self.imported_rows = 0
+
+    async def async_start(self) -> None:
+        """Load unimported hours and the recorder's running sums, then import on every hour boundary."""
+        stored = await self._store.async_load() or {}
+        self._buckets = stored.get("buckets", {})
+
+        for key, statistic_id in self._ids.items():
+            last = await get_instance(self._hass).async_add_executor_job(
+                get_last_statistics, self._hass, 1, statistic_id, True, {"sum"}
+            )
+            if last.get(statistic_id):
+                row = last[statistic_id][0]
+                self._sums[key] = row.get("sum") or 0.0
+                start = hass_dt.utc_from_timestamp(row["start"])
+                if self._last_imported is None or start > self._last_imported:
+                    self._last_imported = start
+
+        self._unsub_timer = async_track_utc_time_change(
+            self._hass, self._async_on_hour, minute=0, second=5
+        )
+        # Anything left over from before a restart goes in now, not in an hour's time.
+        await self._async_import()
+
+    async def async_stop(self) -> None:
+        """Credit time up to now and keep the partial hour for next time."""
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._advance(hass_dt.utcnow())
+        self._status = None
+        await self._store.async_save({"buckets": self._buckets})
+
+    # -- Accounting ---------------------------------------------------------
+
+    @callback
+    def async_observe(self, coordinator) -> None:
+        """Coordinator listener: settle time up to now, then note the new state."""
+        now = hass_dt.utcnow()
+        self._advance(now)
+
+        status = None
+        if coordinator.data and not coordinator.offline:
+            status = interpret_charger_status(
+                coordinator.data.get("charger_info"), coordinator.data.get("inverter_info")
+            )
+        if _is_fault(status) and not _is_fault(self._status):
+            self._bucket(_hour_start(now))["charger_faults"] += 1
+        self._status = status
+
+    def _advance(self, now: datetime) -> None:
+        """Credit [since, now) to the last seen status, split across hour boundaries."""
+        since, self._since = self._since, now
+        if since is None or self._status is None or now <= since:
+            return
+        key = {
+            "Charging Vehicle": "charging_minutes",
+            "Powering Home": "powering_home_minutes",
+        }.get(self._status)
+        while since < now:
+            hour = _hour_start(since)
+            until = min(now, hour + timedelta(hours=1))
+            # Every hour we watched gets a row, even a quiet one; hours we didn't see stay gaps.
+            bucket = self._bucket(hour)
+            if key is not None:
+                bucket[key] += (until - since).total_seconds() / 60
+            since = until
+
+    def _bucket(self, hour: datetime) -> dict:
+        return self._buckets.setdefault(hour.isoformat(), {key: 0 for key in STATISTICS})
+
+    # -- Importing ----------------------------------------------------------
+
+    async def _async_on_hour(self, now: datetime) -> None:
+        self._advance(now)
+        await self._async_import()
+
+    async def _async_import(self) -> None:
+        """Push every finished hour in one batch per statistic, oldest first."""
+        current_hour = _hour_start(hass_dt.utcnow())
+        finished = sorted(
+            (datetime.fromisoformat(hour), values)
+            for hour, values in self._buckets.items()
+            if datetime.fromisoformat(hour) < current_hour
+        )
+        if not finished:
+            return
+
+        for key, (name, unit, unit_class) in STATISTICS.items():
+            rows = []
+            for hour, values in finished:
+                if self._last_imported is not None and hour <= self._last_imported:
+                    continue  # Already in the recorder; don't double the sum.
+                value = round(values[key], 2)
+                self._sums[key] += value
+                rows.append({"start": hour, "state": value, "sum": round(self._sums[key], 2)})
+            if not rows:
+                continue
+            async_add_external_statistics(
+                self._hass,
+                {
+                    "source": DOMAIN,
+                    "statistic_id": self._ids[key],
+                    "name": f"{self._title} {name}",
+                    "unit_of_measurement": unit,
+                    "unit_class": unit_class,
+                    "has_mean": False,
+                    "mean_type": StatisticMeanType.NONE,
+                    "has_sum": True,
+                },
+                rows,
+            )
+            self.imported_rows += len(rows)
+
+        self._last_imported = max(self._last_imported or finished[-1][0], finished[-1][0])
+        for hour, _ in finished:
+            self._buckets.pop(hour.isoformat(), None)
+        await self._store.async_save({"buckets": self._buckets})
+        _LOGGER.debug("Imported %d hour(s) of FCSP statistics", len(finished))
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "statistic_ids": list(self._ids.values()),
+            "pending_hours": sorted(self._buckets),
+            "last_imported": self._last_imported.isoformat() if self._last_imported else None,
+            "imported_rows": self.imported_rows,
+            "sums": {key: round(value, 2) for key, value in self._sums.items()},
+        }
+
+
+async def async_remove_statistics_store(hass: HomeAssistant, station: str) -> None:
+    """Forget a station's unimported hours. What's already in the recorder stays there."""
+    await _store(hass, station).async_remove()
+
+
+def _store(hass: HomeAssistant, station: str) -> Store:
+    return Store(hass, STATISTICS_STORE_VERSION, f"{DOMAIN}_statistics_{station}")
+
+
+def _is_fault(status) -> bool:
+    return bool(status) and status.startswith("Charger Fault")
@@ -0,0 +1,172 @@
+# WEBSOCKET: One subscription instead of a dozen entities.
+# A wall tablet showing the charger and the HIS doesn't need a state_changed event per sensor per
+# poll. `local_fcsp/subscribe` sends the whole station snapshot once, then — after each refresh that
+# actually changed something — just the fields that changed, as dot-separated paths.
+#
+# Every subscriber to a station shares one SnapshotStream, so the snapshot is built and diffed once
+# per refresh however many tablets are watching. When the last one leaves, the stream goes too.
+
+import logging
+
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN, ENDPOINTS, REDACT_KEYS
+from .coordinator import interpret_charger_status, interpret_inverter_state
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_ENTRY_ID = "entry_id"
+
+
+@callback
+def async_setup_websocket(hass: HomeAssistant) -> None:
+    websocket_api.async_register_command(hass, websocket_subscribe)
+
+
+@websocket_api.websocket_command({
+    vol.Required("type"): f"{DOMAIN}/subscribe",
+    vol.Optional(ATTR_ENTRY_ID): str,
+})
+@callback
+def websocket_subscribe(hass: HomeAssistant, connection, msg: dict) -> None:
+    """Send the station snapshot now, then a delta after every refresh that changes it.
+
+    Events are {"snapshot": {...}} once, then {"changed": {path: value}, "removed": [path]}.
+    Apply "removed" before "changed". Paths are dot-separated; list items are numbered.
+    """
+    coordinators = hass.data.get(DOMAIN, {}).get("coordinators", {})
+    entry_id = msg.get(ATTR_ENTRY_ID)
+    # Two entries for the same station share one coordinator; that's still only one station.
+    if entry_id is None and len({id(coordinator) for coordinator in coordinators.values()}) == 1:
+        entry_id = next(iter(coordinators))
+    coordinator = coordinators.get(entry_id)
+    if coordinator is None:
+        connection.send_error(
+            msg["id"],
+            websocket_api.ERR_NOT_FOUND,
+            f"No loaded Local FCSP entry with id '{entry_id}'"
+            if entry_id
+            else "More than one charge station is set up; say which with entry_id",
+        )
+        return
+
+    if coordinator.stream is None:
+        coordinator.stream = SnapshotStream(hass, coordinator)
+    stream = coordinator.stream
+
+    @callback
+    def send(payload: dict) -> None:
+        connection.send_message(websocket_api.event_message(msg["id"], payload))
+
+    connection.subscriptions[msg["id"]] = stream.async_subscribe(send)
+    connection.send_result(msg["id"])
+    send({"snapshot": stream.snapshot})
+
+
+class SnapshotStream:
+    """One station's snapshot, kept flat and diffed once per refresh for every subscriber."""
+
+    def __init__(self, hass: HomeAssistant, coordinator) -> None:
+        self._hass = hass
+        self._coordinator = coordinator
+        self._subscribers = set()
+        self._unsubs = []
+        self._flat = {}
+        self.snapshot = {}
+        self.deltas_sent = 0
+
+    @callback
+    def async_subscribe(self, send) -> callable:
+        if not self._subscribers:
+            self._start()
+        self._subscribers.add(send)
+
+        @callback
+        def unsubscribe() -> None:
+            self._subscribers.discard(send)
+            if not self._subscribers:
+                self.async_close()
+
+        return unsubscribe
+
+    def _start(self) -> None:
+        self.snapshot = build_snapshot(self._coordinator)
+        self._flat = flatten(self.snapshot)
+        # The coordinator also calls async_push when the probe flips "online" between polls.
+        self._unsubs = [self._coordinator.async_add_listener(self.async_push)]
+
+    @callback
+    def async_close(self, reason: str | None = None) -> None:
+        """Stop listening: the last subscriber left, or (with a reason to tell them) the station is going."""
+        while self._unsubs:
+            self._unsubs.pop()()
+        if reason is not None:
+            for send in list(self._subscribers):
+                send({"closed": reason})
+        self._subscribers.clear()
+        if self._coordinator.stream is self:
+            self._coordinator.stream = None
+
+    @callback
+    def async_push(self) -> None:
+        """Diff against what subscribers last saw and send them the difference, if any."""
+        if not self._subscribers:
+            return
+        snapshot = build_snapshot(self._coordinator)
+        flat = flatten(snapshot)
+        changed = {path: value for path, value in flat.items() if self._flat.get(path, _MISSING) != value}
+        removed = [path for path in self._flat if path not in flat]
+        self.snapshot, self._flat = snapshot, flat
+        if not changed and not removed:
+            return
+
+        delta = {}
+        if removed:
+            delta["removed"] = removed
+        if changed:
+            delta["changed"] = changed
+        self.deltas_sent += 1
+        for send in list(self._subscribers):
+            send(delta)
+
+
+_MISSING = object()
+
+
+def build_snapshot(coordinator) -> dict:
+    """What a dashboard wants: the cleaned endpoint data (redacted), plus what we make of it."""
+    data = coordinator.data or {}
+    charger_info = data.get("charger_info")
+    inverter_info = data.get("inverter_info")
+    attached = coordinator.home_integration_attached
+    updated = coordinator._last_update_dt
+    return {
+        "status": {
+            "online": coordinator.online,
+            "charger_status": interpret_charger_status(charger_info, inverter_info),
+            "home_integration_attached": attached,
+            "inverter_state": interpret_inverter_state(inverter_info) if attached else None,
+            "power_cut": coordinator.is_power_cut_active() if attached else None,
+            "last_update": updated.isoformat() if updated else None,
+            "stale": [ep for ep in ENDPOINTS if coordinator.is_stale(ep)],
+        },
+        "data": async_redact_data({ep: data[ep] for ep in ENDPOINTS if ep in data}, REDACT_KEYS),
+    }
+
+
+def flatten(value, prefix: str = "", out: dict | None = None) -> dict:
+    """{"a": {"b": [1, 2]}} -> {"a.b.0": 1, "a.b.1": 2}. Empty containers are kept as leaves."""
+    if out is None:
+        out = {}
+    if isinstance(value, dict) and value:
+        for key, item in value.items():
+            flatten(item, f"{prefix}.{key}" if prefix else str(key), out)
+    elif isinstance(value, list) and value:
+        for index, item in enumerate(value):
+            flatten(item, f"{prefix}.{index}" if prefix else str(index), out)
+    else:
+        out[prefix] = value
+    return out